@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Benchmark do caminho de detecção e interpretação das cartas.
+
+Monta frames sintéticos de câmera a partir das cartas em recursos/ variando
+quantidade de cartas, escala, rotação, desfoque, ruído e iluminação. Mede a
+latência de decodificação (p50/p95/p99), frames por segundo e recall de
+cartas, o ganho do rastreamento de cartas paradas (tempo de backend com e sem
+reaproveitar as cartas cuja região não mudou), além do tempo de processar_sequencia_comandos e
+extrair_comandos_jogador isolados (contra o registro de cartas), o desenho de sprites (overlay_image contra
+Sprite.desenhar), a simulação em lote de sequências (contra
+executar_movimento em Python), o preview da câmera (espelhar e reduzir em tamanho cheio
+contra reduzir e espelhar direto na tela) e as alocações de memória por quadro do loop principal (com
+tracemalloc; o benchmark falha se o loop passar dos limites de alocação). Os resultados são salvos em
+JSON para comparar versões.
+
+Uso:
+    python benchmark.py                            # Roda tudo e salva benchmark.json
+    python benchmark.py --saida v2.json --comparar v1.json
+    python benchmark.py --rapido                   # Menos cenários e frames
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from deteccao import BACKENDS, CodigoQR, DecodificadorQR, Retangulo, calibrar_backend
+from captura import CapturaAssincrona
+from cartas import EstabilizadorCartas, RegistroCartas, comandos_da_sequencia
+from jogo import (atualizar_jogo, criar_jogo, executar_movimento, extrair_comandos_jogador, extrair_textos_qr,
+                  processar_sequencia_comandos)
+from main import carregar_imagem, carregar_recursos
+from simulacao import DIRECOES, simular
+from renderizacao import PreviewCamera, Renderizador, Sprite, desenhar_mensagem_executando, overlay_image
+
+
+# Cenário base; cada variação altera apenas um parâmetro
+CENARIO_BASE = {'cartas': 6, 'tamanho': 140, 'rotacao': 0, 'desfoque': 0.0, 'ruido': 0.0, 'luz': 1.0}
+VARIACOES = {
+    'cartas': [2, 6, 12, 20, 30],
+    'tamanho': [80, 110, 200],
+    'rotacao': [8, 20],
+    'desfoque': [1.0, 2.0],
+    'ruido': [8.0, 20.0],
+    'luz': [0.5, 1.4],
+}
+
+# Limites de alocação do loop principal depois do aquecimento (um preview 320x240 sozinho já tem 225 KiB)
+LIMITE_PICO_QUADRO = 16 * 1024  # Bytes alocados temporariamente em um quadro
+LIMITE_RETIDO_QUADRO = 1024     # Bytes que continuam alocados, em média, a cada quadro
+
+
+def carregar_cartas(pasta="recursos"):
+    """Carrega as cartas geradas (texto do QR -> imagem em cinza)."""
+    cartas = {}
+    for caminho in sorted(glob.glob(os.path.join(pasta, "Jogador*_*.png"))):
+        jogador, comando = os.path.splitext(os.path.basename(caminho))[0].split("_")
+        texto = f"{jogador.replace('Jogador', '')}-{comando.lower()}"
+        cartas[texto] = cv2.imread(caminho, cv2.IMREAD_GRAYSCALE)
+    if not cartas:
+        raise SystemExit("❌ Nenhuma carta encontrada. Rode antes: python gerar_recursos.py --qrcodes")
+    return cartas
+
+
+def gerar_frame(cartas, cenario, rng, largura=1920, altura=1080):
+    """Compõe um frame sintético e retorna (frame BGR, textos esperados da esquerda para a direita)."""
+    frame = np.full((altura, largura), 110, dtype=np.float32)
+    frame += rng.normal(0, 4, (altura, largura)).astype(np.float32)  # Textura da mesa
+
+    tamanho = cenario['tamanho']
+    celula = int(tamanho * 1.3)
+    colunas = max(largura // celula, 1)
+    textos = list(cartas)
+    esperados = []
+
+    for i in range(cenario['cartas']):
+        linha, coluna = divmod(i, colunas)
+        x, y = 20 + coluna * celula, 20 + linha * celula
+        if y + celula > altura:
+            break
+        texto = textos[rng.integers(len(textos))]
+        carta = cv2.resize(cartas[texto], (tamanho, tamanho), interpolation=cv2.INTER_AREA)
+
+        angulo = cenario['rotacao'] * rng.uniform(-1, 1)
+        if angulo:
+            matriz = cv2.getRotationMatrix2D((tamanho / 2, tamanho / 2), angulo, 1.0)
+            carta = cv2.warpAffine(carta, matriz, (tamanho, tamanho), borderValue=255)
+
+        frame[y:y + tamanho, x:x + tamanho] = carta
+        esperados.append((linha, coluna, texto))
+
+    # Iluminação: ganho global com um gradiente horizontal
+    gradiente = np.linspace(0.85, 1.15, largura, dtype=np.float32)
+    frame *= cenario['luz'] * gradiente
+    if cenario['desfoque']:
+        frame = cv2.GaussianBlur(frame, (0, 0), cenario['desfoque'])
+    if cenario['ruido']:
+        frame += rng.normal(0, cenario['ruido'], frame.shape).astype(np.float32)
+
+    cinza = np.clip(frame, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(cinza, cv2.COLOR_GRAY2BGR), [texto for _, _, texto in sorted(esperados)]
+
+
+def recall(codigos, esperados):
+    """Fração das cartas esperadas que foram lidas (considerando cartas repetidas)."""
+    if not esperados:
+        return 1.0
+    lidos = Counter(extrair_textos_qr(codigos))
+    return sum((lidos & Counter(esperados)).values()) / len(esperados)
+
+
+def percentis(amostras_ms):
+    amostras = np.array(amostras_ms)
+    return {
+        'p50_ms': float(np.percentile(amostras, 50)),
+        'p95_ms': float(np.percentile(amostras, 95)),
+        'p99_ms': float(np.percentile(amostras, 99)),
+        'media_ms': float(amostras.mean()),
+    }
+
+
+def medir_cenario(nome, cenario, cartas, backend, num_frames, rng):
+    """Decodifica `num_frames` frames do cenário com o front end completo."""
+    decodificador = DecodificadorQR(backend)
+    tempos, recalls = [], []
+    for _ in range(num_frames):
+        frame, esperados = gerar_frame(cartas, cenario, rng)
+        inicio = time.perf_counter()
+        codigos = decodificador(frame)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        recalls.append(recall(codigos, esperados))
+
+    resultado = {'nome': nome, **cenario, **percentis(tempos),
+                 'fps': 1000 / np.mean(tempos), 'recall': float(np.mean(recalls))}
+    print(f"  {nome:16s} p50 {resultado['p50_ms']:7.1f} ms | p95 {resultado['p95_ms']:7.1f} ms | "
+          f"{resultado['fps']:6.1f} fps | recall {resultado['recall']:.2f}")
+    return resultado
+
+
+class BackendCronometrado:
+    """Envolve um backend e soma o tempo gasto nas decodificações."""
+
+    def __init__(self, backend):
+        self.backend, self.nome, self.tempo = backend, backend.nome, 0.0
+
+    def decodificar(self, cinza):
+        inicio = time.perf_counter()
+        codigos = self.backend.decodificar(cinza)
+        self.tempo += time.perf_counter() - inicio
+        return codigos
+
+
+def medir_rastreamento(cartas, backend, rng, num_frames=40):
+    """Cartas paradas com ruído de câmera e uma mão cobrindo uma delas no meio da sequência."""
+    base, _ = gerar_frame(cartas, CENARIO_BASE, rng)
+    tamanho, celula = CENARIO_BASE['tamanho'], int(CENARIO_BASE['tamanho'] * 1.3)
+    frames = []
+    for i in range(num_frames):
+        frame = cv2.add(base, rng.integers(0, 4, base.shape, dtype=np.uint8))
+        if num_frames // 2 <= i < num_frames // 2 + 8:
+            frame[10:30 + tamanho, 10 + celula:30 + celula + tamanho] = 60
+        frames.append(frame)
+
+    resultado = {'frames': num_frames}
+    for nome, opcoes in [('rastreamento', {}), ('sem_reaproveitar', {'limiar_mudanca': -1.0})]:
+        cronometrado = BackendCronometrado(backend)
+        decodificador = DecodificadorQR(cronometrado, **opcoes)
+        for frame in frames:
+            decodificador(frame)
+        resultado[f'{nome}_ms'] = cronometrado.tempo * 1000
+        resultado[f'{nome}_cartas_reaproveitadas'] = decodificador.cartas_reaproveitadas
+    print(f"  com rastreamento:  {resultado['rastreamento_ms']:7.1f} ms de backend "
+          f"({resultado['rastreamento_cartas_reaproveitadas']} cartas reaproveitadas)")
+    print(f"  sem reaproveitar:  {resultado['sem_reaproveitar_ms']:7.1f} ms de backend "
+          f"({resultado['sem_reaproveitar_ms'] / resultado['rastreamento_ms']:.1f}x)")
+    return resultado
+
+
+def cronometrar(funcao, repeticoes):
+    """Tempo médio por chamada, em microssegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def medir_interpretacao(num_cartas=24, repeticoes=2000):
+    """Tempo de processar_sequencia_comandos e extrair_comandos_jogador contra o registro de cartas."""
+    direcoes = ["cima", "baixo", "esquerda", "direita"]
+    textos = []
+    for jogador in ["1", "2"]:
+        meio = [f"{jogador}-{direcoes[i % 4]}" for i in range(num_cartas // 2 - 2)]
+        textos += [f"{jogador}-inicio", *meio, f"{jogador}-fim"]
+    codigos = [CodigoQR(t.encode("utf-8"), Retangulo(i * 10, 0, 10, 10)) for i, t in enumerate(textos)]
+    registro, estabilizador = RegistroCartas(), EstabilizadorCartas()
+
+    def interpretar_registro():
+        por_jogador = registro.separar(codigos)
+        estabilizador.atualizar(por_jogador)
+        return [comandos_da_sequencia(por_jogador.get(j)) for j in ["1", "2"]]
+
+    resultado = {
+        'cartas': len(codigos),
+        'processar_sequencia_comandos_us': cronometrar(
+            lambda: processar_sequencia_comandos(codigos, False), repeticoes),
+        'extrair_comandos_jogador_us': cronometrar(
+            lambda: extrair_comandos_jogador(textos, "1"), repeticoes),
+        'registro_cartas_us': cronometrar(interpretar_registro, repeticoes),
+    }
+    print(f"  processar_sequencia_comandos: {resultado['processar_sequencia_comandos_us']:.1f} µs "
+          f"({resultado['cartas']} cartas)")
+    print(f"  extrair_comandos_jogador:     {resultado['extrair_comandos_jogador_us']:.1f} µs")
+    print(f"  registro + estabilizador:     {resultado['registro_cartas_us']:.1f} µs "
+          f"({resultado['processar_sequencia_comandos_us'] / resultado['registro_cartas_us']:.1f}x)")
+    return resultado
+
+
+def simular_em_python(comandos, grid_cols, grid_rows):
+    """Referência: executar_movimento sequência por sequência, parando no destino."""
+    destino, posicoes = (grid_cols - 1, 0), []
+    for linha in comandos.tolist():
+        x, y = 0, grid_rows - 1
+        for indice in linha:
+            if indice < 0 or (x, y) == destino:
+                break
+            x, y = executar_movimento(x, y, DIRECOES[indice], grid_cols, grid_rows)
+        posicoes.append((x, y))
+    return np.array(posicoes)
+
+
+def medir_simulacao(rng, sequencias=20000, comprimento=12, grid_cols=10, grid_rows=7):
+    """Compara a simulação vetorizada com o laço de executar_movimento."""
+    comandos = rng.integers(0, len(DIRECOES), (sequencias, comprimento), dtype=np.int8)
+    # Sequências de tamanhos variados (preenchidas com -1)
+    tamanhos = rng.integers(1, comprimento + 1, sequencias)
+    comandos[np.arange(comprimento) >= tamanhos[:, np.newaxis]] = -1
+
+    inicio = time.perf_counter()
+    resultado_vetorizado = simular(comandos, grid_cols, grid_rows)
+    vetorizado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    referencia = simular_em_python(comandos, grid_cols, grid_rows)
+    python = time.perf_counter() - inicio
+
+    resultado = {
+        'sequencias': sequencias,
+        'comprimento': comprimento,
+        'vetorizado_ms': vetorizado * 1000,
+        'python_ms': python * 1000,
+        'iguais': bool((resultado_vetorizado['posicoes'] == referencia).all()),
+    }
+    print(f"  simular (vetorizado):       {resultado['vetorizado_ms']:.1f} ms ({sequencias} sequências)")
+    print(f"  executar_movimento (laço):  {resultado['python_ms']:.1f} ms "
+          f"({python / vetorizado:.1f}x) | resultados iguais: {'sim' if resultado['iguais'] else 'NÃO'}")
+    return resultado
+
+
+def medir_sprites(repeticoes=500, tamanho=128):
+    """Compara overlay_image (float por canal) com Sprite.desenhar (inteiro pré-multiplicado)."""
+    imagem = carregar_imagem("imagens/usuario1.png", tamanho)
+    if imagem is None:
+        return {}
+    sprite = Sprite(imagem)
+    tela = np.full((960, 1280, 3), 128, dtype=np.uint8)
+
+    resultado = {
+        'overlay_image_us': cronometrar(lambda: overlay_image(tela, imagem, 256, 256), repeticoes),
+        'sprite_desenhar_us': cronometrar(lambda: sprite.desenhar(tela, 256, 256), repeticoes),
+        'sprite_recortado_us': cronometrar(lambda: sprite.desenhar(tela, -tamanho // 2, 900), repeticoes),
+    }
+    print(f"  overlay_image:              {resultado['overlay_image_us']:.1f} µs")
+    print(f"  Sprite.desenhar:            {resultado['sprite_desenhar_us']:.1f} µs "
+          f"({resultado['overlay_image_us'] / resultado['sprite_desenhar_us']:.1f}x)")
+    print(f"  Sprite.desenhar (recortado): {resultado['sprite_recortado_us']:.1f} µs")
+    return resultado
+
+
+def medir_preview(cartas, rng, repeticoes=300, largura=320, altura=240):
+    """Compara o preview antigo (flip do frame cheio + resize linear) com PreviewCamera + flip na tela."""
+    resultado = {}
+    tela = np.zeros((960, 1280, 3), dtype=np.uint8)
+    regiao = tela[20:20 + altura, 20:20 + largura]
+    for nome, (w, h) in [('720p', (1280, 720)), ('1080p', (1920, 1080))]:
+        frame = gerar_frame(cartas, CENARIO_BASE, rng, w, h)[0]
+        espelhado = np.empty_like(frame)
+        reduzido = np.empty((altura, largura, 3), dtype=np.uint8)
+
+        def antigo():
+            cv2.flip(frame, 1, dst=espelhado)
+            cv2.resize(espelhado, (largura, altura), dst=reduzido)
+            regiao[...] = reduzido
+
+        linear = PreviewCamera(largura, altura, cv2.INTER_LINEAR)
+        vizinho = PreviewCamera(largura, altura, cv2.INTER_NEAREST)
+        resultado[f'preview_{nome}_antigo_us'] = cronometrar(antigo, repeticoes)
+        resultado[f'preview_{nome}_linear_us'] = cronometrar(
+            lambda: cv2.flip(linear.atualizar(frame), 1, dst=regiao), repeticoes)
+        resultado[f'preview_{nome}_vizinho_us'] = cronometrar(
+            lambda: cv2.flip(vizinho.atualizar(frame), 1, dst=regiao), repeticoes)
+        print(f"  {nome:5s} antigo {resultado[f'preview_{nome}_antigo_us']:7.1f} µs | "
+              f"INTER_LINEAR {resultado[f'preview_{nome}_linear_us']:7.1f} µs | "
+              f"INTER_NEAREST {resultado[f'preview_{nome}_vizinho_us']:7.1f} µs")
+    return resultado
+
+
+class CameraSintetica:
+    """Imita cv2.VideoCapture.read (inclusive a escrita no buffer recebido) com frames prontos."""
+
+    def __init__(self, frames, fps=60):
+        self.frames, self.intervalo, self.indice = frames, 1 / fps, 0
+
+    def read(self, image=None):
+        time.sleep(self.intervalo)
+        frame = self.frames[self.indice % len(self.frames)]
+        self.indice += 1
+        if image is None or image.shape != frame.shape:
+            return True, frame.copy()
+        np.copyto(image, frame)
+        return True, image
+
+
+def _medir_alocacoes(quadro, quadros, aquecimento):
+    """Bytes alocados temporariamente (pico) e retidos por quadro, segundo o tracemalloc."""
+    for _ in range(aquecimento):
+        quadro()
+    picos = []
+    tracemalloc.start()
+    inicio, _ = tracemalloc.get_traced_memory()
+    for _ in range(quadros):
+        antes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        quadro()
+        picos.append(tracemalloc.get_traced_memory()[1] - antes)
+    fim, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'pico_medio_bytes': float(np.mean(picos)), 'pico_max_bytes': int(max(picos)),
+            'retido_por_quadro_bytes': (fim - inicio) / quadros}
+
+
+def medir_memoria(cartas, rng, quadros=120, aquecimento=30, largura=1280, altura=960, tamanho_celula=128):
+    """Compara as alocações por quadro do loop atual (buffers reaproveitados) com o caminho antigo."""
+    frames = [gerar_frame(cartas, CENARIO_BASE, rng, 1280, 720)[0] for _ in range(4)]
+    recursos = carregar_recursos(tamanho_celula, largura, altura)
+    preview_config = {'largura': 320, 'altura': 240, 'x': 20, 'y': 20}
+    cores = {"1": (0, 255, 0), "2": (0, 100, 255)}
+    jogo = criar_jogo(largura // tamanho_celula, altura // tamanho_celula, 0.0, mostrar_console=False)
+
+    # Loop atual: captura em buffers emprestados, preview e tela pré-alocados
+    captura = CapturaAssincrona(CameraSintetica(frames)).iniciar()
+    renderizador = Renderizador(recursos, largura, altura, tamanho_celula, jogo['destino'], preview_config, cores)
+    preview_camera = PreviewCamera(preview_config['largura'], preview_config['altura'])
+    estado_loop = {'id': 0, 't': 0.0}
+
+    def quadro_atual():
+        with captura.emprestar_frame(estado_loop['id'], timeout=1.0) as (frame, estado_loop['id'], _):
+            preview = preview_camera.atualizar(frame)
+        estado_loop['t'] += 1 / 30
+        atualizar_jogo(jogo, [], estado_loop['t'])
+        pixels = (jogo['posicoes'] * tamanho_celula).tolist()
+        personagens = [(sprite, x, y) for sprite, (x, y) in zip(recursos['personagens'], pixels)]
+        renderizador.desenhar(None, personagens, None, preview)
+
+    atual = _medir_alocacoes(quadro_atual, quadros, aquecimento)
+    captura.parar()
+
+    # Caminho antigo: frame novo por leitura, flip e resize alocando, cópia da tela e alpha em float
+    camera = CameraSintetica(frames)
+    imagens = {nome: carregar_imagem(f"imagens/{arquivo}", tamanho_celula)
+               for nome, arquivo in [('p1', "usuario1.png"), ('p2', "usuario2.png"), ('destino', "casa.png")]}
+
+    def quadro_antigo():
+        _, frame = camera.read()
+        invertido = cv2.flip(frame, 1)
+        tela = recursos['fundo'].copy()
+        desenhar_mensagem_executando(tela, largura, altura, "1", cores["1"])
+        overlay_image(tela, imagens['destino'], (largura // tamanho_celula - 1) * tamanho_celula, 0)
+        overlay_image(tela, imagens['p1'], 0, altura - 2 * tamanho_celula)
+        overlay_image(tela, imagens['p2'], 0, altura - 2 * tamanho_celula)
+        tela[20:260, 20:340] = cv2.resize(invertido, (320, 240))
+
+    antigo = _medir_alocacoes(quadro_antigo, quadros, aquecimento)
+
+    for nome, r in [("loop atual", atual), ("caminho antigo", antigo)]:
+        print(f"  {nome:15s} pico médio {r['pico_medio_bytes'] / 1024:9.1f} KiB/quadro | "
+              f"pico máx {r['pico_max_bytes'] / 1024:9.1f} KiB | retido {r['retido_por_quadro_bytes']:8.1f} B/quadro")
+
+    atual['dentro_do_limite'] = (atual['pico_max_bytes'] <= LIMITE_PICO_QUADRO
+                                 and atual['retido_por_quadro_bytes'] <= LIMITE_RETIDO_QUADRO)
+    if atual['dentro_do_limite']:
+        print(f"  ✓ Loop atual dentro do limite ({LIMITE_PICO_QUADRO // 1024} KiB de pico e "
+              f"{LIMITE_RETIDO_QUADRO} B retidos por quadro)")
+    else:
+        print(f"  ❌ Loop atual acima do limite ({LIMITE_PICO_QUADRO // 1024} KiB de pico e "
+              f"{LIMITE_RETIDO_QUADRO} B retidos por quadro)")
+    return {'atual': atual, 'antigo': antigo}
+
+
+def comparar(atual, anterior):
+    """Mostra a variação de cada métrica em relação a um resultado salvo anteriormente."""
+    print("\n📈 Comparação com o resultado anterior:")
+    anteriores = {c['nome']: c for c in anterior.get('cenarios', [])}
+    for cenario in atual['cenarios']:
+        base = anteriores.get(cenario['nome'])
+        if base:
+            variacao = (cenario['p50_ms'] / base['p50_ms'] - 1) * 100 if base['p50_ms'] else 0.0
+            print(f"  {cenario['nome']:16s} p50 {variacao:+6.1f}% | recall {cenario['recall'] - base['recall']:+.2f}")
+    for secao in ['rastreamento', 'interpretacao', 'sprites', 'preview', 'simulacao']:
+        for chave, valor in atual.get(secao, {}).items():
+            base = anterior.get(secao, {}).get(chave)
+            if chave.endswith(('_us', '_ms')) and base:
+                print(f"  {chave:34s} {(valor / base - 1) * 100:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark da detecção de QR codes e da interpretação das cartas com frames sintéticos.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python benchmark.py
+  python benchmark.py --saida v2.json --comparar v1.json
+  python benchmark.py --rapido --backend opencv
+        """
+    )
+    parser.add_argument('--saida', default='benchmark.json', help='Arquivo JSON de resultados (padrão: benchmark.json)')
+    parser.add_argument('--comparar', help='Resultado JSON anterior para comparação')
+    parser.add_argument('--backend', choices=['auto', *BACKENDS], default='auto',
+                        help='Decodificador de QR code (padrão: calibração automática)')
+    parser.add_argument('--frames', type=int, default=5, help='Frames por cenário (padrão: 5)')
+    parser.add_argument('--rapido', action='store_true', help='Roda apenas a variação de quantidade de cartas')
+    parser.add_argument('--semente', type=int, default=0, help='Semente dos frames sintéticos')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semente)
+    cartas = carregar_cartas()
+
+    if args.backend == 'auto':
+        backend = calibrar_backend([gerar_frame(cartas, CENARIO_BASE, rng)[0] for _ in range(3)])
+    else:
+        backend = BACKENDS[args.backend]()
+
+    variacoes = {'cartas': VARIACOES['cartas']} if args.rapido else VARIACOES
+    cenarios = [('base', CENARIO_BASE)]
+    cenarios += [(f"{chave}={valor}", {**CENARIO_BASE, chave: valor})
+                 for chave, valores in variacoes.items() for valor in valores
+                 if CENARIO_BASE[chave] != valor]
+
+    print(f"\n🧪 Decodificação ({backend.nome}, {args.frames} frames por cenário):")
+    resultados = [medir_cenario(nome, cenario, cartas, backend, args.frames, rng) for nome, cenario in cenarios]
+
+    print(f"\n🧪 Rastreamento de cartas paradas ({CENARIO_BASE['cartas']} cartas):")
+    rastreamento = medir_rastreamento(cartas, backend, rng)
+
+    print("\n🧪 Interpretação das cartas:")
+    interpretacao = medir_interpretacao()
+
+    print("\n🧪 Desenho de sprites:")
+    sprites = medir_sprites()
+
+    print("\n🧪 Preview da câmera (320x240):")
+    preview = medir_preview(cartas, rng)
+
+    print("\n🧪 Simulação em lote:")
+    simulacao = medir_simulacao(rng)
+
+    print("\n🧪 Alocações por quadro do loop principal (tracemalloc):")
+    memoria = medir_memoria(cartas, rng)
+
+    saida = {
+        'data': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'plataforma': platform.platform(),
+        'backend': backend.nome,
+        'frames_por_cenario': args.frames,
+        'cenarios': resultados,
+        'rastreamento': rastreamento,
+        'interpretacao': interpretacao,
+        'sprites': sprites,
+        'preview': preview,
+        'simulacao': simulacao,
+        'memoria': memoria,
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(saida, arquivo, indent=2, ensure_ascii=False)
+    print(f"\n✓ Resultados salvos em '{args.saida}'")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(saida, json.load(arquivo))
+
+    if not memoria['atual']['dentro_do_limite']:
+        raise SystemExit("❌ O loop principal voltou a alocar memória a cada quadro")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cache em disco dos recursos já preparados para a tela.
+
+Decodificar os PNGs originais e redimensioná-los (e preparar a cor
+pré-multiplicada dos sprites) a cada execução custa mais do que ler o
+resultado pronto. O cache guarda esses arrays como arquivos .npy em
+`.cache_recursos/`, abertos com mapeamento de memória: carregar um recurso já
+preparado é só abrir o arquivo, e as páginas são lidas do disco quando usadas.
+
+Cada entrada tem o nome da imagem de origem e dos parâmetros (tamanho da célula,
+tamanho da tela) e é validada pelo hash do conteúdo do arquivo de origem; se a
+imagem mudar, a entrada é refeita e a versão antiga é apagada.
+"""
+
+import glob
+import hashlib
+import os
+import shutil
+
+import numpy as np
+
+
+PASTA_CACHE = ".cache_recursos"
+
+
+def hash_arquivo(caminho):
+    """Hash (curto) do conteúdo de um arquivo, ou None se ele não existir."""
+    try:
+        with open(caminho, "rb") as arquivo:
+            return hashlib.sha256(arquivo.read()).hexdigest()[:16]
+    except OSError:
+        return None
+
+
+class CacheRecursos:
+    """Arrays derivados de imagens de origem, guardados como .npy e abertos com mmap."""
+
+    def __init__(self, pasta=PASTA_CACHE):
+        self.pasta = pasta
+        self.reaproveitados = 0
+        self.gerados = 0
+
+    def _prefixo(self, caminho, parametros):
+        nome = os.path.splitext(os.path.basename(caminho))[0]
+        return os.path.join(self.pasta, "_".join([nome, *map(str, parametros)]))
+
+    def obter(self, caminho, parametros, construir):
+        """Arrays de `caminho` preparados com `parametros` ({nome: array}) ou None se a origem não existir.
+
+        Na falta de uma entrada válida, chama `construir()` (que retorna o
+        dicionário de arrays ou None) e grava o resultado.
+        """
+        chave = hash_arquivo(caminho)
+        if chave is None:
+            return None
+        prefixo = self._prefixo(caminho, parametros)
+
+        # Cada entrada é uma pasta com um .npy por array, criada de uma vez (rename atômico)
+        entrada = f"{prefixo}-{chave}"
+        if os.path.isdir(entrada):
+            try:
+                arrays = {nome[:-4]: np.load(os.path.join(entrada, nome), mmap_mode='r')
+                          for nome in os.listdir(entrada) if nome.endswith(".npy")}
+                self.reaproveitados += 1
+                return arrays
+            except (OSError, ValueError):
+                pass  # Entrada corrompida: refaz
+
+        arrays = construir()
+        if arrays is None:
+            return None
+        self._salvar(prefixo, entrada, arrays)
+        self.gerados += 1
+        return arrays
+
+    def _salvar(self, prefixo, entrada, arrays):
+        temporaria = f"{entrada}.tmp{os.getpid()}"
+        try:
+            # Versões geradas a partir de outro conteúdo da mesma imagem não servem mais
+            for antiga in glob.glob(f"{glob.escape(prefixo)}-*"):
+                shutil.rmtree(antiga, ignore_errors=True)
+            os.makedirs(temporaria)
+            for nome, array in arrays.items():
+                np.save(os.path.join(temporaria, f"{nome}.npy"), np.ascontiguousarray(array))
+            os.replace(temporaria, entrada)
+        except OSError as erro:
+            shutil.rmtree(temporaria, ignore_errors=True)
+            print(f"⚠️ Não foi possível salvar o cache de '{os.path.basename(entrada)}': {erro}")
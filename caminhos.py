@@ -0,0 +1,86 @@
+"""
+Campo de distâncias até o destino e análise de sequências.
+
+Uma busca em largura a partir do destino calcula, para cada célula do
+tabuleiro, o menor número de movimentos até ele, com as mesmas regras de
+`jogo.executar_movimento` e de `simulacao` (movimentos contra a borda não saem
+do lugar). O campo é calculado uma vez por tamanho de tabuleiro e destino; a
+partir dele o caminho mais curto e a avaliação de uma sequência capturada saem
+na hora, sem esperar a animação de 0.8 s por movimento.
+"""
+
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+from simulacao import DESLOCAMENTO_X, DESLOCAMENTO_Y, DIRECOES, codificar_sequencias, simular
+
+
+def vizinhos(x, y, grid_cols, grid_rows):
+    """(direção, x, y) alcançados a partir de (x, y) com cada comando."""
+    for indice, direcao in enumerate(DIRECOES):
+        vx = min(max(x + int(DESLOCAMENTO_X[indice]), 0), grid_cols - 1)
+        vy = min(max(y + int(DESLOCAMENTO_Y[indice]), 0), grid_rows - 1)
+        yield direcao, vx, vy
+
+
+@lru_cache(maxsize=32)
+def campo_distancias(grid_cols, grid_rows, destino):
+    """Matriz (grid_rows x grid_cols) com a distância de cada célula até o destino (somente leitura)."""
+    distancias = np.full((grid_rows, grid_cols), -1, dtype=np.int32)
+    dx, dy = destino
+    distancias[dy, dx] = 0
+    fila = deque([(dx, dy)])
+    while fila:
+        x, y = fila.popleft()
+        # Os movimentos são reversíveis: vizinhos do destino alcançam-no com o movimento oposto
+        for _, vx, vy in vizinhos(x, y, grid_cols, grid_rows):
+            if distancias[vy, vx] < 0:
+                distancias[vy, vx] = distancias[y, x] + 1
+                fila.append((vx, vy))
+    distancias.setflags(write=False)
+    return distancias
+
+
+@lru_cache(maxsize=1024)
+def caminho_mais_curto(grid_cols, grid_rows, origem, destino):
+    """Sequência de direções mais curta de `origem` até `destino` (tupla)."""
+    distancias = campo_distancias(grid_cols, grid_rows, destino)
+    x, y = origem
+    caminho = []
+    while distancias[y, x] > 0:
+        for direcao, vx, vy in vizinhos(x, y, grid_cols, grid_rows):
+            if distancias[vy, vx] == distancias[y, x] - 1:
+                caminho.append(direcao)
+                x, y = vx, vy
+                break
+    return tuple(caminho)
+
+
+def analisar_sequencia(comandos, grid_cols, grid_rows, origem, destino):
+    """Avalia uma sequência capturada antes de executá-la.
+
+    Retorna 'minimo' (movimentos do caminho mais curto), 'movimentos' (os que
+    serão executados; a partida para no destino), 'desperdicio' (movimentos que
+    não aproximaram o personagem do destino), 'distancia_final',
+    'chega_ao_destino' e 'termina_no_destino' (sem a parada no destino).
+    """
+    destino = tuple(destino)
+    distancias = campo_distancias(grid_cols, grid_rows, destino)
+    matriz = codificar_sequencias([comandos])
+    partida = simular(matriz, grid_cols, grid_rows, inicio=origem, destino=destino)
+    completa = simular(matriz, grid_cols, grid_rows, inicio=origem, destino=destino, parar_no_destino=False)
+
+    minimo = int(distancias[origem[1], origem[0]])
+    x, y = partida['posicoes'][0]
+    distancia_final = int(distancias[y, x])
+    movimentos = int(partida['passos'][0])
+    return {
+        'minimo': minimo,
+        'movimentos': movimentos,
+        'desperdicio': movimentos - (minimo - distancia_final),
+        'distancia_final': distancia_final,
+        'chega_ao_destino': bool(partida['chegou'][0]),
+        'termina_no_destino': bool(completa['terminou_no_destino'][0]),
+    }
@@ -0,0 +1,230 @@
+"""
+Pipeline assíncrono de captura e decodificação de QR codes.
+
+A câmera é lida em uma thread própria, a decodificação roda em um pool de
+workers que sempre pega o frame mais recente (frames antigos são descartados)
+e o loop de renderização apenas consulta o último resultado disponível.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+from deteccao import INATIVO, REAPROVEITAR
+
+
+# Resultado publicado pelos workers de decodificação
+ResultadoDeteccao = namedtuple(
+    "ResultadoDeteccao", ["codigos", "id_frame", "tempo_captura", "duracao"])
+
+
+class CapturaAssincrona:
+    """Lê frames da câmera em uma thread própria, mantendo apenas o mais recente.
+
+    Os frames são lidos em um conjunto fixo de buffers reaproveitados. Quem usa
+    um frame o pega emprestado com `emprestar_frame`; a câmera nunca escreve em
+    um buffer emprestado nem no buffer do frame mais recente.
+    """
+
+    def __init__(self, cap, instrumentacao=None):
+        self.cap = cap
+        self.instrumentacao = instrumentacao
+        self._cond = threading.Condition()
+        self._buffers = []      # Frames pré-alocados (crescem só se todos estiverem emprestados)
+        self._emprestimos = []  # Quantos consumidores estão usando cada buffer
+        self._atual = -1        # Índice do buffer com o frame mais recente
+        self._id = 0
+        self._tempo = 0.0
+        self._ativo = False
+        self.falhou = False
+        self._thread = threading.Thread(target=self._executar, name="captura", daemon=True)
+
+    def iniciar(self):
+        self._ativo = True
+        self._thread.start()
+        return self
+
+    def parar(self):
+        with self._cond:
+            self._ativo = False
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    def _buffer_livre(self):
+        with self._cond:
+            for indice, emprestimos in enumerate(self._emprestimos):
+                if not emprestimos and indice != self._atual:
+                    return indice
+            self._buffers.append(None)
+            self._emprestimos.append(0)
+            return len(self._buffers) - 1
+
+    def _executar(self):
+        while self._ativo:
+            if self.instrumentacao is not None:
+                self.instrumentacao.acompanhar_profiler()
+            indice = self._buffer_livre()
+            inicio = time.perf_counter()
+            # Com um buffer do tamanho certo, o OpenCV escreve nele sem alocar
+            ret, frame = self.cap.read(self._buffers[indice])
+            tempo = time.perf_counter()
+            if self.instrumentacao is not None:
+                self.instrumentacao.registrar("camera", inicio)
+            with self._cond:
+                if ret:
+                    self._buffers[indice] = frame
+                    self._atual, self._id, self._tempo = indice, self._id + 1, tempo
+                else:
+                    self.falhou, self._ativo = True, False
+                self._cond.notify_all()
+
+    @contextmanager
+    def emprestar_frame(self, ultimo_id, timeout=0.1):
+        """Espera um frame mais novo que `ultimo_id` e o empresta durante o bloco `with`.
+
+        Produz (frame, id, tempo) ou None se nenhum frame novo chegou a tempo.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._id > ultimo_id or not self._ativo, timeout)
+            if self._id <= ultimo_id:
+                indice, item = None, None
+            else:
+                indice = self._atual
+                self._emprestimos[indice] += 1
+                item = (self._buffers[indice], self._id, self._tempo)
+        try:
+            yield item
+        finally:
+            if indice is not None:
+                with self._cond:
+                    self._emprestimos[indice] -= 1
+
+
+class DecodificadorAssincrono:
+    """Pool de workers que decodificam sempre o frame mais recente da captura."""
+
+    def __init__(self, captura, funcao_decodificar, num_workers=2, agendador=None, instrumentacao=None):
+        self.captura = captura
+        self.funcao_decodificar = funcao_decodificar
+        self.agendador = agendador
+        self.instrumentacao = instrumentacao
+        self.decodificados = 0
+        self.pulados = 0
+        self._lock = threading.Lock()
+        self._ultimo_reivindicado = 0
+        self._resultado = None
+        self._ativo = False
+        self._workers = [
+            threading.Thread(target=self._executar, name=f"decodificador-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+
+    def iniciar(self):
+        self._ativo = True
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def parar(self):
+        self._ativo = False
+        for worker in self._workers:
+            worker.join(timeout=1.0)
+
+    def _reivindicar(self, id_frame):
+        """Garante que cada frame seja decodificado por um único worker."""
+        with self._lock:
+            if id_frame <= self._ultimo_reivindicado:
+                return False
+            self._ultimo_reivindicado = id_frame
+            return True
+
+    def _executar(self):
+        while self._ativo:
+            if self.instrumentacao is not None:
+                self.instrumentacao.acompanhar_profiler()
+            with self.captura.emprestar_frame(self._ultimo_reivindicado) as item:
+                if item is None:
+                    if self.captura.falhou:
+                        break
+                    continue
+                if self._reivindicar(item[1]):
+                    self._processar(*item)
+
+    def _processar(self, frame, id_frame, tempo_captura):
+        """Decodifica (ou reaproveita o último resultado) e publica o resultado do frame."""
+        decisao = self.agendador.avaliar(frame) if self.agendador else None
+        if decisao == INATIVO:
+            with self._lock:
+                self.pulados += 1
+            return
+
+        anterior = self._resultado
+        reaproveitado = decisao == REAPROVEITAR and anterior is not None
+        if reaproveitado:
+            # Imagem parada: o último resultado continua válido para este frame e conta como
+            # confirmação das cartas (senão a confiança só subiria a cada intervalo_maximo do agendador)
+            confirmar = getattr(self.funcao_decodificar, 'confirmar', None)
+            codigos = confirmar() if confirmar is not None else anterior.codigos
+            resultado = ResultadoDeteccao(codigos, id_frame, tempo_captura, 0.0)
+        else:
+            inicio = time.perf_counter()
+            codigos = self.funcao_decodificar(frame)
+            resultado = ResultadoDeteccao(codigos, id_frame, tempo_captura, time.perf_counter() - inicio)
+            if self.instrumentacao is not None:
+                self.instrumentacao.registrar("decodificacao", inicio)
+
+        # Descarta resultados de frames mais antigos que o já publicado
+        with self._lock:
+            if reaproveitado:
+                self.pulados += 1
+            else:
+                self.decodificados += 1
+            if self._resultado is None or id_frame > self._resultado.id_frame:
+                self._resultado = resultado
+
+    def ultimo_resultado(self):
+        """Retorna o resultado de decodificação mais recente (ou None)."""
+        return self._resultado
+
+
+class MedidorLatencia:
+    """Mede fps de renderização, fps de decodificação e latência ponta a ponta."""
+
+    def __init__(self, intervalo=5.0, amostras=300):
+        self.intervalo = intervalo
+        self.latencias = deque(maxlen=amostras)
+        self._quadros = 0
+        self._decodificados_inicio = 0
+        self._tempo_inicio = time.perf_counter()
+
+    def registrar_latencia(self, tempo_captura):
+        """Registra o tempo entre a captura de um frame e a exibição do seu resultado."""
+        self.latencias.append(time.perf_counter() - tempo_captura)
+
+    def registrar_quadro(self, decodificador):
+        """Conta um quadro exibido e imprime o relatório a cada `intervalo` segundos."""
+        self._quadros += 1
+        agora = time.perf_counter()
+        decorrido = agora - self._tempo_inicio
+        if decorrido < self.intervalo:
+            return
+
+        decodificados, pulados = decodificador.decodificados, decodificador.pulados
+        fps_render = self._quadros / decorrido
+        fps_decodificacao = (decodificados - self._decodificados_inicio) / decorrido
+        texto = f"📊 Render: {fps_render:.1f} fps | Decodificação: {fps_decodificacao:.1f} fps"
+        if decodificados + pulados:
+            texto += f" | Zbar evitado em {100 * pulados / (decodificados + pulados):.0f}% dos frames"
+        reaproveitadas = getattr(decodificador.funcao_decodificar, 'cartas_reaproveitadas', 0)
+        relidas = getattr(decodificador.funcao_decodificar, 'cartas_relidas', 0)
+        if reaproveitadas + relidas:
+            texto += f" | Cartas reaproveitadas: {100 * reaproveitadas / (reaproveitadas + relidas):.0f}%"
+        if self.latencias:
+            lat = np.array(self.latencias) * 1000
+            texto += f" | Latência: média {lat.mean():.0f} ms, p95 {np.percentile(lat, 95):.0f} ms"
+        print(texto)
+
+        self._quadros, self._decodificados_inicio, self._tempo_inicio = 0, decodificados, agora
@@ -0,0 +1,110 @@
+"""
+Vocabulário das cartas e estabilização pela confiança de leitura.
+
+Cada payload de QR code (bytes) é interpretado uma única vez: o registro guarda
+o resultado e, nos frames seguintes, a mesma carta custa apenas uma consulta
+de dicionário. As cartas viram tokens imutáveis e compartilhados (Carta), então
+comparações entre frames usam hashes já calculados em vez de decodificar,
+normalizar e separar textos a cada frame.
+
+As regras são as mesmas de `jogo.extrair_comandos_jogador`: o texto é
+normalizado com strip().lower(); "J-inicio" e "J-fim" só valem com o texto
+exato; as direções vêm do segundo campo de split('-').
+"""
+
+from collections import namedtuple
+
+
+DIRECOES = ("cima", "baixo", "esquerda", "direita")
+
+# texto: texto normalizado | jogador: campo antes do primeiro '-'
+# comando: "inicio", "fim", uma das DIRECOES ou None (carta do jogador sem comando válido)
+Carta = namedtuple("Carta", ["texto", "jogador", "comando"])
+
+
+def interpretar_carta(dados):
+    """Converte o payload de um QR code em Carta (ou None se não for carta de jogador)."""
+    try:
+        texto = dados.decode("utf-8").strip().lower()
+    except UnicodeDecodeError:
+        return None
+    if "-" not in texto:
+        return None
+
+    partes = texto.split("-")
+    jogador = partes[0]
+    if texto == f"{jogador}-inicio":
+        comando = "inicio"
+    elif texto == f"{jogador}-fim":
+        comando = "fim"
+    else:
+        comando = partes[1] if partes[1] in DIRECOES else None
+    return Carta(texto, jogador, comando)
+
+
+class RegistroCartas(dict):
+    """Mapa payload -> Carta preenchido sob demanda; cartas iguais compartilham o mesmo token."""
+
+    def __init__(self, capacidade=4096):
+        super().__init__()
+        self.capacidade = capacidade
+        self._tokens = {}
+
+    def __missing__(self, dados):
+        # Leituras espúrias não podem fazer o registro crescer sem limite
+        if len(self) >= self.capacidade:
+            self.clear()
+        carta = interpretar_carta(dados)
+        if carta is not None:
+            carta = self._tokens.setdefault(carta, carta)
+        self[dados] = carta
+        return carta
+
+    def separar(self, codigos, confiancas=None):
+        """Agrupa, em uma passada, as cartas de cada jogador na ordem recebida.
+
+        Se `confiancas` for um dicionário, guarda nele a menor confiança de
+        leitura entre as cartas de cada jogador.
+        """
+        por_jogador = {}
+        for codigo in codigos:
+            carta = self[codigo.data]
+            if carta is not None:
+                por_jogador.setdefault(carta.jogador, []).append(carta)
+                if confiancas is not None:
+                    confiancas[carta.jogador] = min(confiancas.get(carta.jogador, 1.0), codigo.confianca)
+        return por_jogador
+
+
+def comandos_da_sequencia(cartas):
+    """Direções entre INICIO e FIM (ou [] se a sequência não estiver completa)."""
+    if not cartas or cartas[0].comando != "inicio" or cartas[-1].comando != "fim":
+        return []
+    return [carta.comando for carta in cartas[1:-1] if carta.comando in DIRECOES]
+
+
+class EstabilizadorCartas:
+    """Acompanha o conjunto de cartas de cada jogador e a confiança com que foi lido."""
+
+    def __init__(self, jogadores=("1", "2")):
+        self.jogadores = tuple(jogadores)
+        vazio = frozenset()
+        self.assinaturas = dict.fromkeys(self.jogadores, vazio)
+        self.confiancas = dict.fromkeys(self.jogadores, 1.0)
+        self.publicadas = dict.fromkeys(self.jogadores, vazio)
+
+    def atualizar(self, por_jogador, confiancas=None):
+        """Registra as cartas do frame atual ({jogador: [Carta, ...]}) e a menor confiança de cada jogador."""
+        confiancas = confiancas or {}
+        for jogador in self.jogadores:
+            self.assinaturas[jogador] = frozenset(por_jogador.get(jogador, ()))
+            self.confiancas[jogador] = confiancas.get(jogador, 1.0)
+
+    def mudaram(self, confianca_minima=1.0):
+        """Indica se algum jogador tem cartas confiáveis diferentes das últimas publicadas."""
+        return any(self.confiancas[j] >= confianca_minima and self.assinaturas[j] != self.publicadas[j]
+                   for j in self.jogadores)
+
+    def publicar(self):
+        """Marca as assinaturas atuais como as últimas mostradas."""
+        self.publicadas = dict(self.assinaturas)
@@ -0,0 +1,416 @@
+"""
+Decisão de quando e onde decodificar QR codes.
+
+O zbar é o estágio mais caro do loop. O agendador evita chamá-lo quando o
+resultado seria descartado (fases de execução e vitória) ou quando a imagem da
+câmera praticamente não mudou desde a última decodificação. O front end de
+decodificação reduz o trabalho de cada chamada: converte para cinza uma única
+vez, procura apenas símbolos QR e rastreia as cartas entre frames. Cada carta
+encontrada vira uma trilha com identificador persistente (associada pela
+sobreposição dos retângulos); enquanto a miniatura da sua região não muda, a
+carta é reaproveitada sem decodificar de novo, e só as regiões que mudaram
+voltam ao zbar. A confiança de cada carta cresce a cada frame em que ela é
+confirmada e cai quando ela some. Uma carta que sumiu continua sendo procurada
+na sua região por alguns frames, mas só as cartas vistas no frame atual são
+retornadas (senão uma carta movida apareceria duas vezes).
+
+A decodificação em si fica a cargo de um backend (pyzbar ou OpenCV), escolhido
+na inicialização pelo desempenho medido em frames reais da câmera.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+
+# Mesmos campos usados do resultado do pyzbar (data e rect.left/top/width/height),
+# mais a confiança (0..1) e o identificador da trilha quando a carta é rastreada
+Retangulo = namedtuple("Retangulo", ["left", "top", "width", "height"])
+CodigoQR = namedtuple("CodigoQR", ["data", "rect", "confianca", "id"], defaults=(1.0, None))
+
+# Carta rastreada entre frames; `confirmacoes` conta frames seguidos em que foi vista
+Trilha = namedtuple("Trilha", ["id", "data", "rect", "miniatura", "confirmacoes", "perdas"])
+
+
+# Decisões do agendador
+INATIVO = "inativo"            # Não decodifica e não publica nada
+REAPROVEITAR = "reaproveitar"  # Imagem parada: republica o último resultado (e confirma as cartas)
+DECODIFICAR = "decodificar"    # Roda o decodificador no frame
+
+
+class AgendadorDecodificacao:
+    """Decide, frame a frame, se o zbar precisa rodar."""
+
+    def __init__(self, limiar_movimento=3.0, intervalo_maximo=0.5, tamanho_miniatura=(80, 60)):
+        self.limiar_movimento = limiar_movimento
+        self.intervalo_maximo = intervalo_maximo
+        self.tamanho_miniatura = tamanho_miniatura
+        self.ativo = True
+        self._lock = threading.Lock()
+        self._miniatura_ref = None
+        self._tempo_ultima_decodificacao = 0.0
+        self.tempo_ultimo_movimento = 0.0  # Último frame (perf_counter) em que a imagem mudou
+
+    def definir_ativo(self, ativo):
+        """Liga/desliga a decodificação conforme a fase do jogo."""
+        if ativo and not self.ativo:
+            # Ao voltar a aguardar cartas, força uma decodificação imediata
+            self._miniatura_ref = None
+        self.ativo = ativo
+
+    def miniatura(self, frame):
+        """Versão reduzida e em tons de cinza do frame, usada na comparação."""
+        pequeno = cv2.resize(frame, self.tamanho_miniatura, interpolation=cv2.INTER_AREA)
+        if pequeno.ndim == 3:
+            pequeno = cv2.cvtColor(pequeno, cv2.COLOR_BGR2GRAY)
+        return pequeno
+
+    def avaliar(self, frame):
+        """Retorna INATIVO, REAPROVEITAR ou DECODIFICAR para o frame."""
+        if not self.ativo:
+            return INATIVO
+
+        miniatura = self.miniatura(frame)
+        agora = time.perf_counter()
+        with self._lock:
+            if self._miniatura_ref is not None:
+                pontuacao = cv2.absdiff(miniatura, self._miniatura_ref).mean()
+                expirado = agora - self._tempo_ultima_decodificacao >= self.intervalo_maximo
+                if pontuacao < self.limiar_movimento:
+                    if not expirado:
+                        return REAPROVEITAR
+                else:
+                    self.tempo_ultimo_movimento = agora
+            else:
+                self.tempo_ultimo_movimento = agora
+
+            self._miniatura_ref = miniatura
+            self._tempo_ultima_decodificacao = agora
+            return DECODIFICAR
+
+
+def expandir_retangulo(rect, margem, largura, altura):
+    """Expande o retângulo em `margem` (fração do tamanho) e recorta nos limites da imagem."""
+    mx, my = int(rect.width * margem), int(rect.height * margem)
+    x0, y0 = max(rect.left - mx, 0), max(rect.top - my, 0)
+    x1 = min(rect.left + rect.width + mx, largura)
+    y1 = min(rect.top + rect.height + my, altura)
+    return x0, y0, x1, y1
+
+
+def unir_regioes(regioes):
+    """Une regiões (x0, y0, x1, y1) que se sobrepõem, evitando decodificar pixels duas vezes."""
+    regioes = sorted(regioes)
+    unidas = []
+    for regiao in regioes:
+        for i, outra in enumerate(unidas):
+            if regiao[0] <= outra[2] and outra[0] <= regiao[2] and regiao[1] <= outra[3] and outra[1] <= regiao[3]:
+                unidas[i] = (min(regiao[0], outra[0]), min(regiao[1], outra[1]),
+                             max(regiao[2], outra[2]), max(regiao[3], outra[3]))
+                break
+        else:
+            unidas.append(regiao)
+    # Uma união pode passar a sobrepor outra região; repete até estabilizar
+    return unidas if len(unidas) == len(regioes) else unir_regioes(unidas)
+
+
+def iou(a, b):
+    """Interseção sobre união de dois retângulos."""
+    largura = min(a.left + a.width, b.left + b.width) - max(a.left, b.left)
+    altura = min(a.top + a.height, b.top + b.height) - max(a.top, b.top)
+    if largura <= 0 or altura <= 0:
+        return 0.0
+    intersecao = largura * altura
+    return intersecao / (a.width * a.height + b.width * b.height - intersecao)
+
+
+def associar(retangulos_a, retangulos_b, limiar):
+    """Pares (i, j) com maior sobreposição primeiro; cada índice aparece em no máximo um par."""
+    candidatos = sorted(((iou(a, b), i, j) for i, a in enumerate(retangulos_a)
+                         for j, b in enumerate(retangulos_b)), reverse=True)
+    usados_a, usados_b, pares = set(), set(), []
+    for sobreposicao, i, j in candidatos:
+        if sobreposicao < limiar:
+            break
+        if i not in usados_a and j not in usados_b:
+            usados_a.add(i)
+            usados_b.add(j)
+            pares.append((i, j))
+    return pares
+
+
+class BackendPyzbar:
+    """Decodifica com o zbar, restrito a símbolos QR."""
+
+    nome = "pyzbar"
+
+    def __init__(self):
+        # Levanta ImportError se a biblioteca do zbar não estiver instalada
+        from pyzbar.pyzbar import ZBarSymbol, decode
+        self._decode, self._simbolos = decode, [ZBarSymbol.QRCODE]
+
+    def decodificar(self, cinza):
+        return [CodigoQR(codigo.data, Retangulo(*codigo.rect))
+                for codigo in self._decode(cinza, symbols=self._simbolos)]
+
+
+class BackendOpenCV:
+    """Decodifica com o detector de QR do OpenCV (detecção e decodificação múltipla)."""
+
+    nome = "opencv"
+
+    def __init__(self):
+        # O detector baseado em ArUco (OpenCV >= 4.8) encontra bem mais cartas lado a lado
+        self._classe = getattr(cv2, "QRCodeDetectorAruco", cv2.QRCodeDetector)
+        # O detector guarda estado interno: um por thread
+        self._local = threading.local()
+
+    def decodificar(self, cinza):
+        detector = getattr(self._local, "detector", None)
+        if detector is None:
+            detector = self._local.detector = self._classe()
+
+        ok, textos, pontos, _ = detector.detectAndDecodeMulti(cinza)
+        if not ok:
+            return []
+        codigos = []
+        for texto, quadrilatero in zip(textos, pontos):
+            if texto:  # QR localizado mas não decodificado vem com texto vazio
+                rect = Retangulo(*cv2.boundingRect(quadrilatero.astype(np.float32)))
+                codigos.append(CodigoQR(texto.encode("utf-8"), rect))
+        return codigos
+
+
+BACKENDS = {"pyzbar": BackendPyzbar, "opencv": BackendOpenCV}
+
+
+def backends_disponiveis():
+    """Instancia os backends cujas dependências estão instaladas."""
+    disponiveis = []
+    for nome, classe in BACKENDS.items():
+        try:
+            disponiveis.append(classe())
+        except ImportError as erro:
+            print(f"⚠️ Backend '{nome}' indisponível: {erro}")
+    return disponiveis
+
+
+def calibrar_backend(frames, backends=None):
+    """Mede cada backend em alguns frames e escolhe o mais rápido que lê todas as cartas visíveis."""
+    backends = backends or backends_disponiveis()
+    if not backends:
+        raise RuntimeError("Nenhum backend de decodificação de QR code disponível")
+
+    cinzas = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) if f.ndim == 3 else f for f in frames]
+    medicoes = []
+    for backend in backends:
+        if cinzas:
+            backend.decodificar(cinzas[0])  # Aquecimento
+        inicio = time.perf_counter()
+        lidos = [{codigo.data for codigo in backend.decodificar(cinza)} for cinza in cinzas]
+        tempo = (time.perf_counter() - inicio) / max(len(cinzas), 1)
+        medicoes.append((backend, tempo, lidos))
+
+    # Cartas visíveis em cada frame: tudo o que algum backend conseguiu ler
+    visiveis = [set().union(*(lidos[i] for _, _, lidos in medicoes)) for i in range(len(cinzas))]
+
+    print("\n⏱️  Calibrando decodificadores de QR code:")
+    completos = []
+    for backend, tempo, lidos in medicoes:
+        total = sum(len(l) for l in lidos)
+        completo = all(l == v for l, v in zip(lidos, visiveis))
+        print(f"  {backend.nome:8s} {tempo * 1000:7.1f} ms/frame | {total}/{sum(map(len, visiveis))} leituras")
+        if completo:
+            completos.append((tempo, backend))
+
+    if completos:
+        escolhido = min(completos, key=lambda item: item[0])[1]
+    else:
+        # Nenhum leu tudo: fica com o que leu mais cartas (e, no empate, o mais rápido)
+        escolhido = max(medicoes, key=lambda m: (sum(len(l) for l in m[2]), -m[1]))[0]
+    print(f"✓ Decodificador escolhido: {escolhido.nome}")
+    return escolhido
+
+
+class DecodificadorQR:
+    """Front end de decodificação: cinza, apenas QR, rastreamento de cartas e múltiplas escalas."""
+
+    def __init__(self, backend=None, margem=0.5, intervalo_varredura=5, escala_reduzida=0.5,
+                 intervalo_resolucao_total=20, limiar_mudanca=6.0, limiar_cena=20.0, frames_confianca=5,
+                 max_perdas=2, limiar_iou=0.3):
+        self.backend = backend or backends_disponiveis()[0]
+        self.margem = margem
+        self.intervalo_varredura = intervalo_varredura
+        self.escala_reduzida = escala_reduzida
+        self.intervalo_resolucao_total = intervalo_resolucao_total
+        self.limiar_mudanca = limiar_mudanca      # Diferença média (0..255) que indica região alterada
+        self.limiar_cena = limiar_cena            # Diferença máxima entre blocos que indica carta nova no frame
+        self.frames_confianca = frames_confianca  # Confirmações seguidas até a confiança chegar a 1
+        self.max_perdas = max_perdas              # Frames que uma carta sumida ainda é mantida
+        self.limiar_iou = limiar_iou
+        self.cartas_reaproveitadas = 0
+        self.cartas_relidas = 0
+        self._lock = threading.Lock()
+        self._trilhas = []
+        self._proximo_id = 1
+        self._chamadas = 0
+        self._chamada_aplicada = 0
+        self._cena_varredura = None      # Miniatura do frame na última varredura completa
+        self._local = threading.local()  # Buffers de trabalho de cada thread
+
+    def _buffer(self, nome, forma):
+        """Buffer pré-alocado da thread atual, realocado só se o tamanho do frame mudar."""
+        buffer = getattr(self._local, nome, None)
+        if buffer is None or buffer.shape != forma:
+            buffer = np.empty(forma, dtype=np.uint8)
+            setattr(self._local, nome, buffer)
+        return buffer
+
+    def __call__(self, frame):
+        """Decodifica o frame e retorna uma lista de CodigoQR em coordenadas do frame."""
+        if frame.ndim == 3:
+            cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._buffer("cinza", frame.shape[:2]))
+        else:
+            cinza = frame
+
+        with self._lock:
+            trilhas = self._trilhas
+            self._chamadas += 1
+            chamada = self._chamadas
+
+        # A varredura periódica só é necessária se algo mudou no frame desde a última
+        cena = cv2.resize(cinza, (80, 60), interpolation=cv2.INTER_AREA)
+        with self._lock:
+            referencia = self._cena_varredura
+        cena_mudou = referencia is None or cv2.absdiff(cena, referencia).max() >= self.limiar_cena
+
+        codigos, inalteradas = None, set()
+        if trilhas and (chamada % self.intervalo_varredura or not cena_mudou):
+            # Só volta ao zbar quem sumiu ou cuja região mudou
+            inalteradas = {t.id for t in trilhas if t.perdas == 0 and not self._mudou(cinza, t)}
+            alteradas = [t.rect for t in trilhas if t.id not in inalteradas]
+            codigos = self._decodificar_regioes(cinza, alteradas) if alteradas else []
+            if len(codigos) < len(alteradas):
+                codigos, inalteradas = None, set()  # Alguma carta sumiu da sua região: varre o frame inteiro
+
+        if codigos is None:
+            with self._lock:
+                self._cena_varredura = cena
+            forcar_total = chamada % self.intervalo_resolucao_total == 0
+            visiveis = sum(1 for t in trilhas if t.perdas == 0)
+            codigos = self._decodificar_multiescala(cinza, visiveis, forcar_total)
+
+        with self._lock:
+            # Resultados de frames mais antigos (workers fora de ordem) não mexem nas trilhas
+            if chamada > self._chamada_aplicada:
+                self._trilhas = self._atualizar_trilhas(cinza, self._trilhas, codigos, inalteradas)
+                self._chamada_aplicada = chamada
+                self.cartas_reaproveitadas += len(inalteradas)
+                self.cartas_relidas += len(codigos)
+            trilhas = self._trilhas
+        return self._codigos(trilhas)
+
+    def confirmar(self):
+        """Conta um frame parado (agendador: REAPROVEITAR) como confirmação das cartas visíveis.
+
+        A imagem não mudou desde a última decodificação, então as cartas vistas
+        continuam no lugar; a confiança sobe no ritmo da câmera sem rodar o zbar.
+        Retorna a lista de CodigoQR atualizada.
+        """
+        with self._lock:
+            self._trilhas = [t._replace(confirmacoes=min(t.confirmacoes + 1, self.frames_confianca))
+                             if t.perdas == 0 else t for t in self._trilhas]
+            trilhas = self._trilhas
+        return self._codigos(trilhas)
+
+    def _codigos(self, trilhas):
+        # Cartas que sumiram continuam sendo procuradas, mas não são retornadas
+        return [CodigoQR(t.data, t.rect, self._confianca(t), t.id) for t in trilhas if t.perdas == 0]
+
+    def _confianca(self, trilha):
+        return min(trilha.confirmacoes / self.frames_confianca, 1.0)
+
+    def _miniatura(self, cinza, rect):
+        """Miniatura 16x16 da região da carta, usada para saber se ela mudou."""
+        altura, largura = cinza.shape[:2]
+        x0, y0 = max(rect.left, 0), max(rect.top, 0)
+        x1, y1 = min(rect.left + rect.width, largura), min(rect.top + rect.height, altura)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return cv2.resize(cinza[y0:y1, x0:x1], (16, 16), interpolation=cv2.INTER_AREA)
+
+    def _mudou(self, cinza, trilha):
+        miniatura = self._miniatura(cinza, trilha.rect)
+        if miniatura is None or trilha.miniatura is None:
+            return True
+        return cv2.absdiff(miniatura, trilha.miniatura).mean() >= self.limiar_mudanca
+
+    def _atualizar_trilhas(self, cinza, trilhas, codigos, inalteradas):
+        """Associa as leituras às trilhas existentes e retorna a nova lista de trilhas."""
+        novas, associadas, usados = [], set(), set()
+        for i, j in associar([t.rect for t in trilhas], [c.rect for c in codigos], self.limiar_iou):
+            trilha, codigo = trilhas[i], codigos[j]
+            associadas.add(trilha.id)
+            usados.add(j)
+            if codigo.data == trilha.data:
+                confirmacoes = trilha.confirmacoes + 1
+                novas.append(Trilha(trilha.id, codigo.data, codigo.rect, self._miniatura(cinza, codigo.rect),
+                                    min(confirmacoes, self.frames_confianca), 0))
+            else:
+                # Outra carta no mesmo lugar: nova trilha
+                novas.append(self._nova_trilha(cinza, codigo))
+
+        for trilha in trilhas:
+            if trilha.id in associadas:
+                continue
+            if trilha.id in inalteradas:
+                # Miniatura igual à da última leitura: mesma carta, no mesmo lugar
+                novas.append(trilha._replace(confirmacoes=min(trilha.confirmacoes + 1, self.frames_confianca)))
+            elif trilha.perdas < self.max_perdas:
+                # Não encontrada: continua sendo procurada por alguns frames, com confiança menor
+                novas.append(trilha._replace(confirmacoes=trilha.confirmacoes // 2, perdas=trilha.perdas + 1))
+
+        # Leituras sem trilha (ignorando duplicatas de uma mesma carta lida em duas regiões)
+        for j, codigo in enumerate(codigos):
+            if j not in usados and all(iou(codigo.rect, t.rect) < 0.5 for t in novas):
+                novas.append(self._nova_trilha(cinza, codigo))
+        return novas
+
+    def _nova_trilha(self, cinza, codigo):
+        identificador, self._proximo_id = self._proximo_id, self._proximo_id + 1
+        return Trilha(identificador, codigo.data, codigo.rect, self._miniatura(cinza, codigo.rect), 1, 0)
+
+    def _decodificar(self, cinza, dx=0, dy=0, escala=1.0):
+        """Roda o backend e converte os retângulos para o frame original."""
+        codigos = []
+        for codigo in self.backend.decodificar(cinza):
+            r = codigo.rect
+            rect = Retangulo(int(r.left / escala) + dx, int(r.top / escala) + dy,
+                             int(r.width / escala), int(r.height / escala))
+            codigos.append(CodigoQR(codigo.data, rect))
+        return codigos
+
+    def _decodificar_regioes(self, cinza, retangulos):
+        """Decodifica apenas ao redor das cartas indicadas."""
+        altura, largura = cinza.shape[:2]
+        regioes = unir_regioes([expandir_retangulo(r, self.margem, largura, altura) for r in retangulos])
+        codigos = []
+        for x0, y0, x1, y1 in regioes:
+            codigos.extend(self._decodificar(cinza[y0:y1, x0:x1], x0, y0))
+        return codigos
+
+    def _decodificar_multiescala(self, cinza, esperados, forcar_total=False):
+        """Tenta primeiro uma versão reduzida do frame; cai para a resolução total se faltar carta."""
+        # Sem histórico não há como saber se a versão reduzida perdeu cartas pequenas
+        if esperados and not forcar_total and self.escala_reduzida < 1.0:
+            altura, largura = cinza.shape[:2]
+            forma = (int(altura * self.escala_reduzida), int(largura * self.escala_reduzida))
+            reduzido = cv2.resize(cinza, forma[::-1], dst=self._buffer("reduzido", forma),
+                                  interpolation=cv2.INTER_AREA)
+            codigos = self._decodificar(reduzido, escala=self.escala_reduzida)
+            if len(codigos) >= esperados:
+                return codigos
+        return self._decodificar(cinza)
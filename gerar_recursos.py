@@ -6,62 +6,112 @@ Uso:
     python gerar_recursos.py --qrcodes        # Gera apenas os QR codes
     python gerar_recursos.py --pdfs           # Gera apenas os PDFs
     python gerar_recursos.py --tudo           # Gera QR codes e PDFs
+    python gerar_recursos.py -t --jogadores 6 # Gera tudo para 6 jogadores
+    python gerar_recursos.py -t --forcar      # Regera mesmo o que não mudou
     python gerar_recursos.py --help           # Mostra ajuda
+
+A geração é incremental: o manifesto (recursos/.manifesto.json) guarda o hash
+das entradas de cada arquivo (texto do QR code, jogadores, código deste
+script) e do arquivo gerado; só é refeito o que mudou ou foi alterado/apagado.
+Cada jogador é gerado em um processo separado, e os QR codes vão da memória
+direto para o PDF, sem reler os PNGs do disco.
 """
 
 import argparse
+import hashlib
+import io
+import json
 import os
-import qrcode
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 
-def gerar_qrcodes():
-    """Gera os QR codes para 2 jogadores."""
-    # Cria a pasta recursos se não existir
-    os.makedirs("recursos", exist_ok=True)
+PASTA_RECURSOS = "recursos"
+ARQUIVO_MANIFESTO = os.path.join(PASTA_RECURSOS, ".manifesto.json")
 
-    # Comandos para cada jogador (incluindo início e fim)
-    comandos = ["inicio", "cima", "baixo", "direita", "esquerda", "fim"]
-    jogadores = [1, 2]
+# Comandos de cada jogador (incluindo início e fim)
+COMANDOS = ["inicio", "cima", "baixo", "direita", "esquerda", "fim"]
 
-    print("\n📱 Gerando QR codes para 2 jogadores...\n")
 
-    for jogador in jogadores:
-        print(f"Jogador {jogador}:")
-        for comando in comandos:
-            # Texto do QR code
-            texto_qr = f"{jogador}-{comando}"
-            
-            # Cria o QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            
-            qr.add_data(texto_qr)
-            qr.make(fit=True)
-            
-            # Cria a imagem
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Nome do arquivo bem descritivo
-            nome_arquivo = f"recursos/Jogador{jogador}_{comando.capitalize()}.png"
-            img.save(nome_arquivo)
-            print(f"  ✓ {nome_arquivo}")
-        print()
+def caminho_qrcode(jogador, comando):
+    return f"{PASTA_RECURSOS}/Jogador{jogador}_{comando.capitalize()}.png"
+
+
+def caminho_pdf(jogador):
+    return f"{PASTA_RECURSOS}/Cartelas_Jogador{jogador}.pdf"
+
+
+@lru_cache(maxsize=1)
+def _hash_script():
+    """Hash do código deste arquivo: mudar o layout ou os parâmetros do QR code invalida o manifesto."""
+    with open(__file__, "rb") as arquivo:
+        return hashlib.sha256(arquivo.read()).hexdigest()
+
+
+def hash_entrada(*partes):
+    """Hash das entradas de um arquivo gerado."""
+    return hashlib.sha256("\0".join(map(str, (_hash_script(), *partes))).encode()).hexdigest()
+
+
+def hash_arquivo(caminho):
+    try:
+        with open(caminho, "rb") as arquivo:
+            return hashlib.sha256(arquivo.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def ler_manifesto():
+    try:
+        with open(ARQUIVO_MANIFESTO, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_manifesto(manifesto):
+    with open(ARQUIVO_MANIFESTO, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, indent=2, sort_keys=True)
+
+
+def atualizado(manifesto, caminho, entrada):
+    """Indica se o arquivo existe, veio das mesmas entradas e não foi alterado desde então."""
+    registro = manifesto.get(caminho)
+    return (registro is not None and registro['entrada'] == entrada
+            and registro['saida'] == hash_arquivo(caminho))
+
+
+def criar_qrcode(texto):
+    """Imagem PIL (em memória) do QR code com o texto."""
+    import qrcode  # Importado só quando usado: o --help não precisa dele
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(texto)
+    qr.make(fit=True)
+    return qr.make_image(fill_color="black", back_color="white").get_image()
+
 
-    print("✅ Todos os QR codes foram criados na pasta 'recursos'!\n")
+def criar_pdf_jogador(jogador_num, total_jogadores=2, imagens=None):
+    """Cria um PDF A4 com os QR codes de um jogador (2 páginas: controles + início/fim).
 
+    `imagens` ({comando: imagem PIL}) evita gerar os QR codes de novo; sem ela, são criados em memória.
+    """
+    # O reportlab é pesado de importar; só é carregado quando há PDF para gerar
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
 
-def criar_pdf_jogador(jogador_num):
-    """Cria um PDF A4 com os QR codes de um jogador (2 páginas: controles + início/fim)."""
+    if imagens is None:
+        imagens = {comando: criar_qrcode(f"{jogador_num}-{comando}") for comando in COMANDOS}
     
     # Nome do arquivo PDF
-    pdf_filename = f"recursos/Cartelas_Jogador{jogador_num}.pdf"
+    pdf_filename = caminho_pdf(jogador_num)
     
     # Cria o canvas PDF (tamanho A4)
     c = canvas.Canvas(pdf_filename, pagesize=A4)
@@ -94,9 +144,9 @@ def criar_pdf_jogador(jogador_num):
     start_x = (largura - (2*qr_size + spacing_x)) / 2
     
     for comando, col, row in comandos:
-        qr_path = f"recursos/Jogador{jogador_num}_{comando}.png"
+        imagem = imagens.get(comando.lower())
         
-        if os.path.exists(qr_path):
+        if imagem is not None:
             x = start_x + col * (qr_size + spacing_x)
             y = start_y - row * (qr_size + spacing_y + 1*cm)
             
@@ -104,7 +154,7 @@ def criar_pdf_jogador(jogador_num):
             c.setStrokeColorRGB(0.7, 0.7, 0.7)
             c.rect(x - 0.3*cm, y - 0.3*cm, qr_size + 0.6*cm, qr_size + 1.4*cm, stroke=1, fill=0)
             
-            c.drawImage(qr_path, x, y, width=qr_size, height=qr_size, preserveAspectRatio=True, mask='auto')
+            c.drawImage(ImageReader(imagem), x, y, width=qr_size, height=qr_size, preserveAspectRatio=True, mask='auto')
             
             c.setFont("Helvetica-Bold", 18)
             c.drawCentredString(x + qr_size/2, y - 0.8*cm, f"{comando.upper()} - Jogador {jogador_num}")
@@ -113,7 +163,7 @@ def criar_pdf_jogador(jogador_num):
     c.setFont("Helvetica-Oblique", 10)
     c.drawCentredString(largura/2, 2*cm, "Use estas cartas para movimentar seu personagem")
     c.setFont("Helvetica", 9)
-    c.drawCentredString(largura/2, 1.3*cm, "QR Code Game - Competição 2 Jogadores - Página 1/2")
+    c.drawCentredString(largura/2, 1.3*cm, f"QR Code Game - Competição {total_jogadores} Jogadores - Página 1/2")
     
     # ===== PÁGINA 2: INÍCIO E FIM =====
     c.showPage()
@@ -134,9 +184,9 @@ def criar_pdf_jogador(jogador_num):
     ]
     
     for comando, pos_y in comandos_especiais:
-        qr_path = f"recursos/Jogador{jogador_num}_{comando}.png"
+        imagem = imagens.get(comando.lower())
         
-        if os.path.exists(qr_path):
+        if imagem is not None:
             x = (largura - qr_size_grande) / 2
             y = pos_y
             
@@ -145,7 +195,7 @@ def criar_pdf_jogador(jogador_num):
             c.setStrokeColorRGB(0.2, 0.5, 0.8)  # Azul
             c.rect(x - 0.4*cm, y - 0.4*cm, qr_size_grande + 0.8*cm, qr_size_grande + 1.6*cm, stroke=1, fill=0)
             
-            c.drawImage(qr_path, x, y, width=qr_size_grande, height=qr_size_grande, preserveAspectRatio=True, mask='auto')
+            c.drawImage(ImageReader(imagem), x, y, width=qr_size_grande, height=qr_size_grande, preserveAspectRatio=True, mask='auto')
             
             c.setFont("Helvetica-Bold", 24)
             c.drawCentredString(largura/2, y - 1*cm, f"{comando.upper()} - Jogador {jogador_num}")
@@ -155,29 +205,99 @@ def criar_pdf_jogador(jogador_num):
     c.drawCentredString(largura/2, 2.5*cm, "IMPORTANTE: Coloque INÍCIO antes e FIM depois das suas jogadas!")
     c.setFont("Helvetica", 9)
     c.drawCentredString(largura/2, 1.5*cm, "O jogo só executa quando detectar: INÍCIO → movimentos → FIM")
-    c.drawCentredString(largura/2, 1*cm, "QR Code Game - Competição 2 Jogadores - Página 2/2")
+    c.drawCentredString(largura/2, 1*cm, f"QR Code Game - Competição {total_jogadores} Jogadores - Página 2/2")
     
     # Salva o PDF
     c.save()
-    print(f"  ✓ {pdf_filename} (2 páginas)")
+    return pdf_filename
 
 
-def gerar_pdfs():
+def _gerar_jogador(jogador, total_jogadores, comandos_png, gerar_pdf):
+    """Tarefa de um processo: QR codes em memória, PNGs pedidos e o PDF. Retorna {caminho: hash}."""
+    imagens = {comando: criar_qrcode(f"{jogador}-{comando}") for comando in COMANDOS}
+    gerados = {}
+    for comando in comandos_png:
+        caminho = caminho_qrcode(jogador, comando)
+        buffer = io.BytesIO()
+        imagens[comando].save(buffer, format="PNG")
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(buffer.getvalue())
+        gerados[caminho] = hashlib.sha256(buffer.getvalue()).hexdigest()
+    if gerar_pdf:
+        caminho = criar_pdf_jogador(jogador, total_jogadores, imagens)
+        gerados[caminho] = hash_arquivo(caminho)
+    return gerados
+
+
+def gerar(num_jogadores=2, qrcodes=True, pdfs=True, forcar=False, processos=None):
+    """Gera os QR codes e/ou PDFs dos jogadores 1..num_jogadores, refazendo só o que mudou."""
+    os.makedirs(PASTA_RECURSOS, exist_ok=True)
+    manifesto = {} if forcar else ler_manifesto()
+
+    # Tarefas por jogador: PNGs desatualizados e se o PDF precisa ser refeito
+    tarefas, entradas = {}, {}
+    for jogador in range(1, num_jogadores + 1):
+        pendentes = []
+        if qrcodes:
+            for comando in COMANDOS:
+                caminho = caminho_qrcode(jogador, comando)
+                entradas[caminho] = hash_entrada(jogador, comando)
+                if not atualizado(manifesto, caminho, entradas[caminho]):
+                    pendentes.append(comando)
+        pdf = False
+        if pdfs:
+            caminho = caminho_pdf(jogador)
+            entradas[caminho] = hash_entrada(jogador, num_jogadores)
+            pdf = not atualizado(manifesto, caminho, entradas[caminho])
+        if pendentes or pdf:
+            tarefas[jogador] = (pendentes, pdf)
+
+    iguais = len(entradas) - sum(len(p) + pdf for p, pdf in tarefas.values())
+    print(f"\n🧩 {num_jogadores} jogadores: {len(entradas) - iguais} arquivos a gerar, {iguais} sem mudanças\n")
+    if not tarefas:
+        return {}
+
+    # Um processo por jogador (com poucos jogadores não compensa subir processos)
+    if len(tarefas) == 1 or processos == 1:
+        resultados = {jogador: _gerar_jogador(jogador, num_jogadores, *tarefa) for jogador, tarefa in tarefas.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = {jogador: executor.submit(_gerar_jogador, jogador, num_jogadores, *tarefa)
+                       for jogador, tarefa in tarefas.items()}
+            resultados = {jogador: futuro.result() for jogador, futuro in futuros.items()}
+
+    gerados = {}
+    for jogador in sorted(resultados):
+        print(f"Jogador {jogador}:")
+        for caminho, saida in resultados[jogador].items():
+            manifesto[caminho] = {'entrada': entradas[caminho], 'saida': saida}
+            gerados[caminho] = saida
+            print(f"  ✓ {caminho}")
+    salvar_manifesto(manifesto)
+    print()
+    return gerados
+
+
+def gerar_qrcodes(num_jogadores=2, forcar=False, processos=None):
+    """Gera os QR codes para os jogadores 1..num_jogadores."""
+    print(f"\n📱 Gerando QR codes para {num_jogadores} jogadores...")
+    gerar(num_jogadores, qrcodes=True, pdfs=False, forcar=forcar, processos=processos)
+    print("✅ Todos os QR codes estão na pasta 'recursos'!\n")
+
+
+def gerar_pdfs(num_jogadores=2, forcar=False, processos=None):
     """Gera PDFs com cartelas de QR codes."""
-    print("\n📄 Gerando PDFs com cartelas de QR codes...\n")
-    
-    for jogador in [1, 2]:
-        criar_pdf_jogador(jogador)
-    
-    print("\n✅ PDFs criados com sucesso na pasta 'recursos'!")
-    print("   - Cartelas_Jogador1.pdf")
-    print("   - Cartelas_Jogador2.pdf")
+    print("\n📄 Gerando PDFs com cartelas de QR codes...")
+    gerar(num_jogadores, qrcodes=False, pdfs=True, forcar=forcar, processos=processos)
+    print("✅ PDFs prontos na pasta 'recursos'!")
+    for jogador in range(1, num_jogadores + 1):
+        print(f"   - Cartelas_Jogador{jogador}.pdf")
     print("\n🖨️  Agora você pode imprimir e distribuir para os jogadores!\n")
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Gera recursos (QR codes e/ou PDFs) para o jogo QR Code de 2 jogadores.",
+        description="Gera recursos (QR codes e/ou PDFs) para o jogo QR Code.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Exemplos de uso:
@@ -185,13 +305,15 @@ Exemplos de uso:
   python gerar_recursos.py --pdfs           Gera apenas os PDFs
   python gerar_recursos.py --tudo           Gera QR codes e PDFs
   python gerar_recursos.py -t               Atalho para --tudo
+  python gerar_recursos.py -t --jogadores 6 Gera tudo para 6 jogadores
+  python gerar_recursos.py -t --forcar      Regera mesmo o que não mudou
         """
     )
     
     parser.add_argument(
         '--qrcodes',
         action='store_true',
-        help='Gera os QR codes PNG para os 2 jogadores'
+        help='Gera os QR codes PNG para os jogadores'
     )
     
     parser.add_argument(
@@ -206,22 +328,46 @@ Exemplos de uso:
         help='Gera tanto QR codes quanto PDFs (atalho: -t)'
     )
     
+    parser.add_argument(
+        '--jogadores', '-j',
+        type=int,
+        default=2,
+        help='Número de jogadores (padrão: 2)'
+    )
+    
+    parser.add_argument(
+        '--forcar', '-f',
+        action='store_true',
+        help='Ignora o manifesto e regera todos os arquivos'
+    )
+    
+    parser.add_argument(
+        '--processos',
+        type=int,
+        default=None,
+        help='Número de processos em paralelo (padrão: um por núcleo)'
+    )
+    
     args = parser.parse_args()
+    if args.jogadores < 1:
+        parser.error("--jogadores deve ser pelo menos 1")
+    if args.processos is not None and args.processos < 1:
+        parser.error("--processos deve ser pelo menos 1")
     
     # Se nenhuma opção foi escolhida, mostra ajuda
     if not (args.qrcodes or args.pdfs or args.tudo):
         parser.print_help()
         return
     
-    # Executa as funções conforme solicitado
+    # Executa as funções conforme solicitado (com --tudo, cada jogador gera PNGs e PDF no mesmo processo)
     if args.tudo:
-        gerar_qrcodes()
-        gerar_pdfs()
+        print(f"\n📦 Gerando QR codes e PDFs para {args.jogadores} jogadores...")
+        gerar(args.jogadores, forcar=args.forcar, processos=args.processos)
     else:
         if args.qrcodes:
-            gerar_qrcodes()
+            gerar_qrcodes(args.jogadores, args.forcar, args.processos)
         if args.pdfs:
-            gerar_pdfs()
+            gerar_pdfs(args.jogadores, args.forcar, args.processos)
     
     print("✨ Concluído!\n")
 
@@ -0,0 +1,102 @@
+"""
+Ritmo do loop de exibição: fps alvo e modo ocioso.
+
+Com a partida parada (cartas iguais, nenhuma animação, nenhuma faixa de
+jogador na tela e a câmera sem movimento), redesenhar e mostrar a mesma tela
+1280x960 a 60 fps só gasta CPU. Depois de `espera_ociosidade` segundos sem
+atividade o governador baixa o loop para `fps_ocioso`; a espera é feita em
+fatias curtas de `cv2.waitKey`, então a janela continua respondendo e qualquer
+movimento na câmera ou leitura nova volta ao fps alvo na hora.
+
+O tempo de CPU do processo (todas as threads) é medido separadamente nos dois
+modos; a economia é estimada pelo custo por segundo do modo ativo aplicado ao
+tempo passado em ociosidade.
+"""
+
+import time
+
+import cv2
+
+
+class GovernadorQuadros:
+    """Limita o loop ao fps alvo e reduz para o fps ocioso quando nada acontece."""
+
+    def __init__(self, fps_alvo=60, fps_ocioso=5, espera_ociosidade=1.0, fatia_espera=0.01):
+        self.fps_alvo = fps_alvo
+        self.fps_ocioso = fps_ocioso
+        self.espera_ociosidade = espera_ociosidade
+        self.fatia_espera = fatia_espera
+        self.ultima_atividade = time.perf_counter()
+        self._cena = None
+        self._assinatura = frozenset()
+
+        # Tempo de parede, CPU e quadros em cada modo
+        self.tempo = {'ativo': 0.0, 'ocioso': 0.0}
+        self.cpu = {'ativo': 0.0, 'ocioso': 0.0}
+        self.quadros = {'ativo': 0, 'ocioso': 0}
+        self._relogio, self._cpu = time.perf_counter(), time.process_time()
+
+    @property
+    def ocioso(self):
+        return time.perf_counter() - self.ultima_atividade >= self.espera_ociosidade
+
+    def registrar_atividade(self):
+        self.ultima_atividade = time.perf_counter()
+
+    def cartas_mudaram(self, codigos):
+        """Indica se as cartas lidas diferem das últimas observadas (sem atualizar)."""
+        return frozenset(c.data for c in codigos) != self._assinatura
+
+    def observar(self, cena, codigos=None):
+        """Registra o quadro atual: cena desenhada (animação, faixa, vencedor) e, se houver, as cartas lidas."""
+        if cena != self._cena:
+            self._cena = cena
+            self.registrar_atividade()
+        if codigos is not None and self.cartas_mudaram(codigos):
+            self._assinatura = frozenset(c.data for c in codigos)
+            self.registrar_atividade()
+
+    def aguardar(self, inicio_quadro, despertar=None):
+        """Espera até o próximo quadro tratando os eventos da janela. Retorna a tecla (& 0xFF) ou 255.
+
+        No modo ocioso, `despertar()` é consultada a cada fatia da espera; se
+        retornar True (movimento, cartas novas) o loop volta ao fps alvo.
+        """
+        modo = 'ocioso' if self.ocioso else 'ativo'
+        fps = self.fps_ocioso if modo == 'ocioso' else self.fps_alvo
+        limite = inicio_quadro + 1 / fps
+        tecla = cv2.waitKey(1) & 0xFF
+        while tecla == 255:
+            restante = limite - time.perf_counter()
+            if restante <= 0:
+                break
+            if modo == 'ocioso' and despertar is not None and despertar():
+                self.registrar_atividade()
+                break
+            tecla = cv2.waitKey(max(1, int(1000 * min(restante, self.fatia_espera)))) & 0xFF
+        if tecla != 255:
+            self.registrar_atividade()
+        self._contabilizar(modo)
+        return tecla
+
+    def _contabilizar(self, modo):
+        relogio, cpu = time.perf_counter(), time.process_time()
+        self.tempo[modo] += relogio - self._relogio
+        self.cpu[modo] += cpu - self._cpu
+        self.quadros[modo] += 1
+        self._relogio, self._cpu = relogio, cpu
+
+    def cpu_economizada(self):
+        """Estimativa (s) da CPU que o tempo ocioso teria consumido no ritmo ativo."""
+        if not self.tempo['ativo']:
+            return 0.0
+        custo_ativo = self.cpu['ativo'] / self.tempo['ativo']
+        return max(custo_ativo * self.tempo['ocioso'] - self.cpu['ocioso'], 0.0)
+
+    def relatorio(self):
+        total = self.tempo['ativo'] + self.tempo['ocioso']
+        if not total:
+            return "💤 Modo ocioso: sem quadros registrados"
+        return (f"💤 Modo ocioso: {100 * self.tempo['ocioso'] / total:.0f}% do tempo "
+                f"({self.quadros['ocioso']} quadros a {self.fps_ocioso} fps) | "
+                f"CPU economizada: ~{self.cpu_economizada():.1f} s em {total:.0f} s")
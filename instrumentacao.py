@@ -0,0 +1,218 @@
+"""
+Instrumentação das etapas do loop do jogo.
+
+Cada etapa (câmera, decodificação, preview, lógica, composição, exibição...)
+registra sua duração em um buffer circular de tamanho fixo, usando o relógio
+monotônico.
+A partir dos buffers é possível mostrar um HUD com fps e p50/p95/p99 de cada
+etapa, exportar as estatísticas para JSON/CSV e capturar um perfil com cProfile
+durante uma partida. O cProfile só mede a thread que o liga, então as threads
+de captura e decodificação ligam cada uma o seu (`acompanhar_profiler`, a cada
+volta do loop) e os perfis são somados ao salvar. Com várias câmeras a
+decodificação roda em outros processos e fica fora do perfil.
+
+Variáveis de ambiente:
+    QRGAME_HUD=1                     Começa com o HUD visível (tecla 'h' alterna)
+    QRGAME_METRICAS=metricas.json    Exporta as estatísticas periodicamente (.json ou .csv)
+    QRGAME_METRICAS_INTERVALO=10     Intervalo da exportação, em segundos
+    QRGAME_PROFILE=30                Captura um perfil cProfile dos primeiros 30 s (tecla 'p' alterna)
+"""
+
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+# espera_frame: loop parado esperando um frame novo da câmera
+# exibicao: só o cv2.imshow
+# espera_janela: cv2.waitKey (eventos da janela) e a espera do governador até o próximo quadro
+ETAPAS = ["camera", "decodificacao", "espera_frame", "preview", "jogo", "composicao", "exibicao", "espera_janela",
+          "quadro"]
+
+
+class Instrumentacao:
+    """Cronometra as etapas do loop com custo baixo (relógio monotônico + buffer circular)."""
+
+    def __init__(self, capacidade=512, etapas=ETAPAS):
+        self.capacidade = capacidade
+        self.etapas = list(etapas)
+        self._amostras = {etapa: np.zeros(capacidade) for etapa in self.etapas}
+        self._contagens = dict.fromkeys(self.etapas, 0)
+        self._lock = threading.Lock()
+
+        self.hud_visivel = os.environ.get("QRGAME_HUD") == "1"
+        self._linhas_hud, self._tempo_hud = [], 0.0
+
+        self.arquivo_metricas = os.environ.get("QRGAME_METRICAS")
+        self.intervalo_metricas = float(os.environ.get("QRGAME_METRICAS_INTERVALO", 10))
+        self._tempo_metricas = time.perf_counter()
+
+        self._profiler, self._fim_profiler = None, None
+        self._geracao_profiler = 0     # Muda a cada captura iniciada
+        self._perfis_threads = []      # (perfil, evento de perfil desligado) das outras threads
+        self._local = threading.local()
+        if os.environ.get("QRGAME_PROFILE"):
+            self.alternar_profiler(duracao=float(os.environ["QRGAME_PROFILE"]))
+
+    @staticmethod
+    def marcar():
+        """Instante atual no relógio usado pela instrumentação."""
+        return time.perf_counter()
+
+    def registrar(self, etapa, inicio):
+        """Registra a duração da etapa iniciada em `inicio` e retorna o instante atual."""
+        agora = time.perf_counter()
+        with self._lock:
+            contagem = self._contagens[etapa]
+            self._amostras[etapa][contagem % self.capacidade] = agora - inicio
+            self._contagens[etapa] = contagem + 1
+        return agora
+
+    def estatisticas(self):
+        """Retorna {etapa: {'n', 'media_ms', 'p50_ms', 'p95_ms', 'p99_ms'}} e o fps do loop."""
+        with self._lock:
+            amostras = {etapa: self._amostras[etapa][:min(self._contagens[etapa], self.capacidade)].copy()
+                        for etapa in self.etapas}
+        resultado = {}
+        for etapa, valores in amostras.items():
+            if not len(valores):
+                continue
+            ms = valores * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            resultado[etapa] = {'n': len(ms), 'media_ms': float(ms.mean()),
+                                'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+        quadro = resultado.get("quadro")
+        fps = 1000 / quadro['media_ms'] if quadro and quadro['media_ms'] else 0.0
+        return resultado, fps
+
+    # ===== HUD =====
+
+    def alternar_hud(self):
+        self.hud_visivel = not self.hud_visivel
+
+    def desenhar_hud(self, tela, x=20, y_base=None):
+        """Desenha o HUD no canto inferior esquerdo. Retorna o retângulo ocupado (ou None)."""
+        if not self.hud_visivel:
+            return None
+
+        # Os percentis são recalculados só duas vezes por segundo
+        agora = time.perf_counter()
+        if agora - self._tempo_hud >= 0.5:
+            estatisticas, fps = self.estatisticas()
+            self._linhas_hud = [f"{fps:5.1f} fps   p50 / p95 / p99 (ms)"] + [
+                f"{etapa:13s} {e['p50_ms']:6.1f} {e['p95_ms']:6.1f} {e['p99_ms']:6.1f}"
+                for etapa, e in estatisticas.items()
+            ]
+            self._tempo_hud = agora
+
+        altura_linha = 22
+        largura, altura = 430, altura_linha * len(self._linhas_hud) + 12
+        y_base = tela.shape[0] - 20 if y_base is None else y_base
+        y = y_base - altura
+        regiao = tela[y:y_base, x:x + largura]
+        regiao //= 3  # Escurece o fundo para o texto ficar legível
+        for i, linha in enumerate(self._linhas_hud):
+            cv2.putText(tela, linha, (x + 8, y + altura_linha * (i + 1)),
+                        cv2.FONT_HERSHEY_PLAIN, 1.2, (255, 255, 255), 1)
+        return x, y, largura, altura
+
+    # ===== Exportação =====
+
+    def exportar(self, caminho):
+        """Salva as estatísticas em JSON ou CSV (conforme a extensão)."""
+        estatisticas, fps = self.estatisticas()
+        if caminho.endswith(".csv"):
+            with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+                escritor = csv.writer(arquivo)
+                escritor.writerow(["etapa", "n", "media_ms", "p50_ms", "p95_ms", "p99_ms"])
+                for etapa, e in estatisticas.items():
+                    escritor.writerow([etapa, e['n'], *(f"{e[c]:.3f}" for c in ["media_ms", "p50_ms", "p95_ms", "p99_ms"])])
+        else:
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                json.dump({'data': time.strftime("%Y-%m-%dT%H:%M:%S"), 'fps': fps, 'etapas': estatisticas},
+                          arquivo, indent=2)
+
+    def atualizar(self):
+        """Tarefas periódicas: exportação das métricas e fim do perfil com duração definida."""
+        agora = time.perf_counter()
+        if self.arquivo_metricas and agora - self._tempo_metricas >= self.intervalo_metricas:
+            self.exportar(self.arquivo_metricas)
+            self._tempo_metricas = agora
+        if self._fim_profiler is not None and agora >= self._fim_profiler:
+            self.alternar_profiler()
+
+    # ===== Profiler =====
+
+    def alternar_profiler(self, duracao=None, espera_threads=1.0):
+        """Inicia ou encerra a captura do cProfile; ao encerrar salva o perfil e mostra o resumo.
+
+        O perfil salvo soma a thread do loop e as threads que chamam `acompanhar_profiler`.
+        """
+        if self._profiler is None:
+            with self._lock:
+                self._perfis_threads = []
+                self._geracao_profiler += 1
+            self._profiler = cProfile.Profile()
+            self._fim_profiler = time.perf_counter() + duracao if duracao else None
+            self._profiler.enable()
+            print("🔬 Profiler iniciado" + (f" por {duracao:.0f} s" if duracao else " (pressione 'p' para encerrar)"))
+            return
+
+        self._profiler.disable()
+        profiler, self._profiler, self._fim_profiler = self._profiler, None, None
+
+        # Cada thread desliga o próprio perfil na próxima volta do seu loop
+        limite = time.perf_counter() + espera_threads
+        with self._lock:
+            perfis_threads, self._perfis_threads = self._perfis_threads, []
+        perfis = [perfil for perfil, desligado in perfis_threads
+                  if desligado.wait(max(limite - time.perf_counter(), 0))]
+        if len(perfis) < len(perfis_threads):
+            print(f"⚠️ {len(perfis_threads) - len(perfis)} thread(s) não encerraram o perfil a tempo e ficaram de fora")
+
+        estatisticas = pstats.Stats(profiler)
+        if perfis:
+            estatisticas.add(*perfis)
+        caminho = time.strftime("perfil_%Y%m%d_%H%M%S.prof")
+        estatisticas.dump_stats(caminho)
+        resumo = io.StringIO()
+        estatisticas.stream = resumo
+        estatisticas.sort_stats("cumulative").print_stats(15)
+        print(resumo.getvalue())
+        print(f"🔬 Perfil salvo em '{caminho}' ({1 + len(perfis)} threads; abra com: python -m pstats {caminho})")
+
+    def acompanhar_profiler(self):
+        """Liga ou desliga o cProfile da thread atual conforme a captura do profiler.
+
+        Chamada a cada volta dos loops das threads de captura e decodificação;
+        sem captura em andamento custa só uma comparação.
+        """
+        geracao = self._geracao_profiler if self._profiler is not None else None
+        atual = getattr(self._local, 'perfil', None)  # (geração, perfil, evento)
+        if atual is not None and atual[0] != geracao:
+            atual[1].disable()
+            atual[2].set()
+            self._local.perfil = atual = None
+        if atual is None and geracao is not None:
+            perfil, desligado = cProfile.Profile(), threading.Event()
+            with self._lock:
+                if geracao != self._geracao_profiler:
+                    return
+                self._perfis_threads.append((perfil, desligado))
+            self._local.perfil = (geracao, perfil, desligado)
+            perfil.enable()
+
+    def encerrar(self):
+        """Finaliza o profiler e grava a última exportação de métricas."""
+        if self._profiler is not None:
+            self.alternar_profiler()
+        if self.arquivo_metricas:
+            self.exportar(self.arquivo_metricas)
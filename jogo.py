@@ -0,0 +1,296 @@
+"""
+Lógica do jogo independente de câmera e janela.
+
+O estado fica em um dicionário criado por `criar_jogo` e é atualizado a cada
+frame por `atualizar_jogo`, que recebe os QR codes detectados e o instante
+atual. O tempo é sempre passado de fora, então o mesmo código roda no jogo ao
+vivo (time.time()) e no replay (tempo simulado a partir do fps do vídeo).
+
+Os movimentos avançam em ticks de duração fixa (PASSO_TICK): o tempo decorrido
+entre chamadas vai para um acumulador e é consumido tick a tick, então a
+velocidade do jogo não depende da oscilação do loop de renderização, e
+`avancar_jogo` roda a mesma lógica sem relógio, tão rápido quanto possível. A
+tela desenha os personagens em `posicoes_interpoladas`, que desliza cada um da
+célula anterior para a nova entre os ticks.
+
+A interpretação das cartas a cada frame usa o registro e o estabilizador de
+`cartas`; as funções de texto abaixo ficam como referência das regras.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from caminhos import analisar_sequencia
+from cartas import EstabilizadorCartas, RegistroCartas, comandos_da_sequencia
+
+CONFIANCA_MINIMA = 1.0  # Confiança de leitura (ver deteccao.DecodificadorQR) para mostrar e capturar as cartas
+INTERVALO_MOVIMENTO = 0.8
+
+PASSO_TICK = 0.05                                            # Duração de um tick da lógica (s)
+TICKS_MOVIMENTO = round(INTERVALO_MOVIMENTO / PASSO_TICK)    # Ticks entre dois movimentos
+TICKS_ANIMACAO = 6                                           # Ticks para deslizar de uma célula à outra
+MAX_TICKS_POR_ATUALIZACAO = 20                               # Depois de uma pausa longa não recupera tudo de uma vez
+
+
+def extrair_textos_qr(codigos):
+    """Extrai textos dos QR codes."""
+    return [codigo.data.decode("utf-8").strip().lower() for codigo in codigos]
+
+
+def extrair_comandos_jogador(textos, jogador):
+    """Extrai comandos válidos de um jogador (entre inicio e fim)."""
+    cartas = [t for t in textos if t.startswith(f"{jogador}-")]
+    
+    # Valida ordem: inicio primeiro, fim último
+    if not cartas or cartas[0] != f"{jogador}-inicio" or cartas[-1] != f"{jogador}-fim":
+        return []
+    
+    # Extrai apenas direções válidas (entre inicio e fim)
+    comandos = []
+    for carta in cartas[1:-1]:  # Pula inicio e fim
+        direcao = carta.split('-')[1]
+        if direcao in ["cima", "baixo", "esquerda", "direita"]:
+            comandos.append(direcao)
+    
+    return comandos
+
+
+def processar_sequencia_comandos(codigos_ordenados, mostrar_console=True, 
+                                cartas_anteriores_j1=None, cartas_anteriores_j2=None):
+    """Processa QR codes e retorna sequências válidas."""
+    cartas_anteriores_j1 = cartas_anteriores_j1 or []
+    cartas_anteriores_j2 = cartas_anteriores_j2 or []
+    
+    # Extrai textos
+    textos = extrair_textos_qr(codigos_ordenados)
+    
+    # Separa por usuário
+    cartas_usuario1 = [t for t in textos if t.startswith("1-")]
+    cartas_usuario2 = [t for t in textos if t.startswith("2-")]
+    
+    # Mostra no console se mudou
+    if mostrar_console:
+        if (set(cartas_usuario1) != set(cartas_anteriores_j1) or 
+            set(cartas_usuario2) != set(cartas_anteriores_j2) or 
+            (not cartas_usuario1 and not cartas_usuario2)):
+            print("\nCartas que estão na tela:")
+            for usuario, cartas in [("1", cartas_usuario1), ("2", cartas_usuario2)]:
+                comandos = [c.split('-')[1].capitalize() for c in cartas if '-' in c] if cartas else ["Nenhuma"]
+                print(f"Usuario {usuario} - {', '.join(comandos)}")
+            print("="*60)
+    
+    # Extrai sequências válidas
+    sequencias = {}
+    for jogador in ["1", "2"]:
+        comandos = extrair_comandos_jogador(textos, jogador)
+        if comandos:
+            sequencias[jogador] = comandos
+    
+    return sequencias, cartas_usuario1, cartas_usuario2
+
+
+def executar_movimento(pos_x, pos_y, direcao, grid_cols, grid_rows):
+    """Executa um movimento e retorna nova posição."""
+    if direcao == "direita":
+        return min(pos_x + 1, grid_cols - 1), pos_y
+    elif direcao == "esquerda":
+        return max(pos_x - 1, 0), pos_y
+    elif direcao == "cima":
+        return pos_x, max(pos_y - 1, 0)
+    elif direcao == "baixo":
+        return pos_x, min(pos_y + 1, grid_rows - 1)
+    return pos_x, pos_y
+
+
+def criar_jogo(grid_cols, grid_rows, agora, mostrar_console=True, num_jogadores=2):
+    """Cria o estado inicial de uma partida com `num_jogadores` jogadores ("1", "2", ...)."""
+    jogadores = [str(i) for i in range(1, num_jogadores + 1)]
+    return {
+        'grid_cols': grid_cols,
+        'grid_rows': grid_rows,
+        'destino': (grid_cols - 1, 0),
+        'mostrar_console': mostrar_console,
+
+        # Tabela de jogadores: o índice na lista é o mesmo em posições, filas e sequências
+        'jogadores': jogadores,
+        'posicoes': np.tile(np.array([0, grid_rows - 1], dtype=np.int32), (num_jogadores, 1)),
+        'filas': [deque() for _ in jogadores],
+        'sequencia_processada': [False] * num_jogadores,
+
+        # Estado do jogo
+        'estado': {
+            'aguardando_todos': True,
+            'executando': None,  # Índice do jogador cujos movimentos estão sendo executados
+            'jogo_ativo': True,
+            'vencedor': None
+        },
+
+        # Relógio de passo fixo
+        'tick': 0,
+        'acumulador': 0.0,
+        'tempo_anterior': agora,
+        'tick_ultimo_movimento': 0,
+
+        # Interpolação: posição antes do último movimento e o tick em que cada jogador se moveu
+        'posicoes_anteriores': np.tile(np.array([0, grid_rows - 1], dtype=np.int32), (num_jogadores, 1)),
+        'ticks_movimento': np.full(num_jogadores, -TICKS_ANIMACAO, dtype=np.int64),
+
+        # Controle de console e estabilização
+        'tempo_ultima_atualizacao_console': agora,
+        'registro': RegistroCartas(),
+        'estabilizador': EstabilizadorCartas(jogadores),
+    }
+
+
+def aguardando_cartas(jogo):
+    """Indica se a partida está na fase em que os QR codes são lidos."""
+    return jogo['estado']['jogo_ativo'] and jogo['estado']['aguardando_todos']
+
+
+def jogador_da_vez(jogo):
+    """Jogador cujos movimentos estão sendo executados (ou None)."""
+    indice = jogo['estado']['executando']
+    return None if indice is None else jogo['jogadores'][indice]
+
+
+def _log(jogo, mensagem):
+    if jogo['mostrar_console']:
+        print(mensagem)
+
+
+def descrever_analise(analise):
+    """Dica de uma linha sobre a sequência capturada."""
+    resumo = (f"   💡 {analise['movimentos']} movimentos (mínimo {analise['minimo']}, "
+              f"{analise['desperdicio']} desperdiçados)")
+    if analise['chega_ao_destino']:
+        return resumo + " - chega ao destino!"
+    return resumo + f" - para a {analise['distancia_final']} casas do destino"
+
+
+def processar_deteccao(jogo, codigos, agora, eventos):
+    """Estabiliza as cartas detectadas e captura as sequências completas."""
+    estado = jogo['estado']
+    estabilizador = jogo['estabilizador']
+    codigos_ordenados = sorted(codigos, key=lambda c: c.rect.left)
+    mostrar_no_console = (agora - jogo['tempo_ultima_atualizacao_console']) >= 1.0
+
+    # Uma passada separa as cartas de todos os jogadores; o estabilizador compara assinaturas já prontas
+    confiancas = {}
+    por_jogador = jogo['registro'].separar(codigos_ordenados, confiancas)
+    estabilizador.atualizar(por_jogador, confiancas)
+
+    # Atualiza console se estável
+    if mostrar_no_console:
+        if estabilizador.mudaram(CONFIANCA_MINIMA):
+            _log(jogo, "\nCartas que estão na tela:")
+            for jogador in jogo['jogadores']:
+                cartas = por_jogador.get(jogador)
+                cmd = [c.texto.split('-')[1].capitalize() for c in cartas] if cartas else ["Nenhuma"]
+                _log(jogo, f"Usuario {jogador} - {', '.join(cmd)}")
+            _log(jogo, "="*60)
+            estabilizador.publicar()
+            eventos.append({'tipo': 'cartas_estaveis',
+                            'cartas': {j: [c.texto for c in por_jogador.get(j, [])] for j in jogo['jogadores']}})
+
+        jogo['tempo_ultima_atualizacao_console'] = agora
+
+    # Captura sequências (só com todas as cartas do jogador lidas com confiança)
+    processadas = jogo['sequencia_processada']
+    for indice, jogador in enumerate(jogo['jogadores']):
+        if processadas[indice] or confiancas.get(jogador, 1.0) < CONFIANCA_MINIMA:
+            continue
+        comandos = comandos_da_sequencia(por_jogador.get(jogador))
+        if comandos:
+            jogo['filas'][indice].extend(comandos)
+            processadas[indice] = True
+            analise = analisar_sequencia(comandos, jogo['grid_cols'], jogo['grid_rows'],
+                                         jogo['posicoes'][indice], jogo['destino'])
+            eventos.append({'tipo': 'sequencia_capturada', 'jogador': jogador, 'comandos': comandos,
+                            'analise': analise})
+            _log(jogo, f"✓ Sequência completa capturada do Usuario {jogador}: {comandos}")
+            _log(jogo, descrever_analise(analise))
+
+    if all(processadas):
+        estado['aguardando_todos'] = False
+        estado['executando'] = 0
+        _log(jogo, "\n🎬 Iniciando execução dos movimentos...")
+
+
+def atualizar_movimentos(jogo, eventos):
+    """Executa o próximo comando da fila do jogador da vez, respeitando o intervalo em ticks."""
+    estado = jogo['estado']
+    indice = estado['executando']
+    if not estado['jogo_ativo'] or indice is None or jogo['tick'] - jogo['tick_ultimo_movimento'] < TICKS_MOVIMENTO:
+        return
+
+    fila, pos = jogo['filas'][indice], jogo['posicoes'][indice]
+    if not fila:
+        return
+    direcao = fila.popleft()
+    jogo['posicoes_anteriores'][indice] = pos
+    pos[0], pos[1] = executar_movimento(int(pos[0]), int(pos[1]), direcao, jogo['grid_cols'], jogo['grid_rows'])
+    jogo['tick_ultimo_movimento'] = jogo['ticks_movimento'][indice] = jogo['tick']
+    eventos.append({'tipo': 'movimento', 'jogador': jogo['jogadores'][indice], 'direcao': direcao,
+                    'posicao': pos.tolist(), 'tick': jogo['tick']})
+
+    # Fila vazia: passa a vez ao próximo jogador (o último continua com a vez)
+    if not fila and indice + 1 < len(jogo['jogadores']):
+        estado['executando'] = indice + 1
+
+
+def verificar_vitoria(jogo):
+    """Encerra a partida quando algum personagem chega ao destino (o de menor índice vence)."""
+    estado = jogo['estado']
+    if estado['jogo_ativo']:
+        chegaram = np.flatnonzero((jogo['posicoes'] == jogo['destino']).all(axis=1))
+        if len(chegaram):
+            estado['jogo_ativo'], estado['vencedor'] = False, f"Jogador {jogo['jogadores'][chegaram[0]]}"
+
+
+def avancar_tick(jogo, eventos):
+    """Um passo fixo da simulação: movimento da vez e vitória."""
+    jogo['tick'] += 1
+    atualizar_movimentos(jogo, eventos)
+    verificar_vitoria(jogo)
+
+
+def avancar_jogo(jogo, codigos, ticks, agora=None):
+    """Processa as cartas e avança exatamente `ticks` ticks. Retorna a lista de eventos ocorridos.
+
+    Não consulta relógio nenhum: testes e replays podem chamar direto, em vez de
+    `atualizar_jogo`, para rodar milhares de ticks por segundo.
+    """
+    eventos = []
+    estado_anterior = dict(jogo['estado'])
+    agora = jogo['tick'] * PASSO_TICK if agora is None else agora
+
+    if codigos and aguardando_cartas(jogo):
+        processar_deteccao(jogo, codigos, agora, eventos)
+    for _ in range(ticks):
+        avancar_tick(jogo, eventos)
+
+    # Transições de estado (aguardando_todos, executando, vencedor, ...)
+    mudancas = {chave: valor for chave, valor in jogo['estado'].items() if estado_anterior[chave] != valor}
+    if mudancas:
+        eventos.append({'tipo': 'estado', 'mudancas': mudancas})
+    return eventos
+
+
+def atualizar_jogo(jogo, codigos, agora):
+    """Avança a partida até o instante `agora`, em ticks fixos. Retorna a lista de eventos ocorridos."""
+    decorrido = max(agora - jogo['tempo_anterior'], 0.0)
+    jogo['tempo_anterior'] = agora
+    acumulador = min(jogo['acumulador'] + decorrido, MAX_TICKS_POR_ATUALIZACAO * PASSO_TICK)
+    ticks = int(acumulador / PASSO_TICK)
+    jogo['acumulador'] = acumulador - ticks * PASSO_TICK
+    return avancar_jogo(jogo, codigos, ticks, agora)
+
+
+def posicoes_interpoladas(jogo):
+    """Posições (N x 2, em células, float) para desenhar, deslizando entre a célula anterior e a atual."""
+    fracao_tick = jogo['acumulador'] / PASSO_TICK
+    progresso = (jogo['tick'] - jogo['ticks_movimento'] + fracao_tick) / TICKS_ANIMACAO
+    progresso = np.clip(progresso, 0.0, 1.0)[:, np.newaxis]
+    anteriores = jogo['posicoes_anteriores']
+    return anteriores + (jogo['posicoes'] - anteriores) * progresso
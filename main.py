@@ -1,7 +1,20 @@
+import argparse
 import cv2
+import json
+import os
 import numpy as np
 import time
-from pyzbar.pyzbar import decode
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cache_recursos import CacheRecursos
+from captura import CapturaAssincrona, DecodificadorAssincrono, MedidorLatencia
+from deteccao import BACKENDS, AgendadorDecodificacao, DecodificadorQR, calibrar_backend
+from governador import GovernadorQuadros
+from instrumentacao import Instrumentacao
+from jogo import aguardando_cartas, atualizar_jogo, criar_jogo, jogador_da_vez, posicoes_interpoladas
+from multicamera import CapturaMulticamera, carregar_transformacoes
+from renderizacao import PreviewCamera, Renderizador, Sprite, desenhar_marca_jogador
+from sessao import GravadorSessao
 
 
 def carregar_imagem(caminho, tamanho):
@@ -13,92 +26,152 @@ def carregar_imagem(caminho, tamanho):
     return cv2.resize(img, (tamanho, tamanho))
 
 
-def extrair_textos_qr(codigos):
-    """Extrai textos dos QR codes."""
-    return [codigo.data.decode("utf-8").strip().lower() for codigo in codigos]
+def carregar_sprite(caminho, tamanho, cache=None, marca=None):
+    """Carrega imagem e prepara o sprite (cor pré-multiplicada e alpha) para desenho rápido.
 
+    `marca` = (número, cor) desenha o selo do jogador no personagem antes de preparar o sprite.
+    Com `cache`, o sprite já preparado vem do cache de recursos (e só é montado se a imagem mudou).
+    """
+    def preparar():
+        img = carregar_imagem(caminho, tamanho)
+        if img is not None and marca is not None:
+            desenhar_marca_jogador(img, *marca)
+        return img
 
-def extrair_comandos_jogador(textos, jogador):
-    """Extrai comandos válidos de um jogador (entre inicio e fim)."""
-    cartas = [t for t in textos if t.startswith(f"{jogador}-")]
-    
-    # Valida ordem: inicio primeiro, fim último
-    if not cartas or cartas[0] != f"{jogador}-inicio" or cartas[-1] != f"{jogador}-fim":
-        return []
-    
-    # Extrai apenas direções válidas (entre inicio e fim)
-    comandos = []
-    for carta in cartas[1:-1]:  # Pula inicio e fim
-        direcao = carta.split('-')[1]
-        if direcao in ["cima", "baixo", "esquerda", "direita"]:
-            comandos.append(direcao)
-    
-    return comandos
+    if cache is None:
+        img = preparar()
+        return Sprite(img) if img is not None else None
 
+    def construir():
+        img = preparar()
+        return Sprite(img).planos() if img is not None else None
+
+    # O número e a cor do selo fazem parte da chave: cada jogador tem a sua entrada
+    parametros = (tamanho,) if marca is None else (tamanho, f"j{marca[0]}", "%02x%02x%02x" % tuple(marca[1]))
+    planos = cache.obter(caminho, parametros, construir)
+    if planos is None:
+        print(f"❌ Erro: '{caminho}' não encontrado!")
+        return None
+    return Sprite.de_planos(planos)
+
+
+ARQUIVO_CACHE = ".cache_inicializacao.json"
+
+
+def ler_cache():
+    """Lê o cache local da inicialização (câmera e decodificador que funcionaram da última vez)."""
+    try:
+        with open(ARQUIVO_CACHE, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_cache(**valores):
+    """Atualiza o cache local da inicialização."""
+    cache = ler_cache()
+    cache.update(valores)
+    try:
+        with open(ARQUIVO_CACHE, "w", encoding="utf-8") as arquivo:
+            json.dump(cache, arquivo, indent=2)
+    except OSError as erro:
+        print(f"⚠️ Não foi possível salvar o cache de inicialização: {erro}")
+
+
+def abrir_camera(indice, resolucao=None, formato=None, fps=None, frames_necessarios=3, tempo_limite=3.0):
+    """Abre a câmera e espera até ela entregar frames válidos seguidos. Retorna o cap ou None.
+
+    `resolucao` é a de decodificação; `formato` é o FOURCC pedido ao driver (ex.: "MJPG").
+    """
+    cap = cv2.VideoCapture(indice)
+    if not cap.isOpened():
+        cap.release()
+        return None
+
+    # O formato vem antes da resolução: em muitas webcams USB as resoluções altas
+    # só chegam a 30 fps em MJPEG (o YUYV sem compressão satura o barramento)
+    if formato:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*formato))
+    if resolucao:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolucao[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolucao[1])
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+
+    # Configura autofoco (se disponível)
+    cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)  # Ativa autofoco
+    cap.set(cv2.CAP_PROP_FOCUS, 0)      # Reset para autofoco automático
+
+    # Em vez de um tempo fixo de aquecimento, lê até a câmera ficar estável
+    limite = time.perf_counter() + tempo_limite
+    seguidos = 0
+    while seguidos < frames_necessarios and time.perf_counter() < limite:
+        ret, frame = cap.read()
+        seguidos = seguidos + 1 if ret and frame is not None and frame.size else 0
+
+    if seguidos >= frames_necessarios:
+        return cap
+    cap.release()
+    return None
+
+
+def descrever_captura(cap):
+    """Resolução, formato e fps negociados com a câmera (ex.: "1280x720 MJPG 30 fps")."""
+    largura = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    altura = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    codigo = int(cap.get(cv2.CAP_PROP_FOURCC))
+    formato = "".join(chr((codigo >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return f"{largura}x{altura}" + (f" {formato}" if formato else "") + (f" {fps:.0f} fps" if fps else "")
+
+
+def _liberar_se_aberta(futuro):
+    cap = futuro.result()
+    if cap is not None:
+        cap.release()
+
+
+def inicializar_camera(indices=range(3), configuracao=None):
+    """Inicializa a câmera: tenta primeiro a do cache e depois testa os índices em paralelo.
+
+    `configuracao` ({'resolucao', 'formato', 'fps'}) é repassada a `abrir_camera`.
+    """
+    configuracao = dict(configuracao or {})
+    cache = ler_cache().get('camera')
+    if cache and cache['indice'] in indices:
+        print(f"Tentando câmera do cache (índice {cache['indice']})...")
+        resolucao = configuracao.pop('resolucao', None) or (cache['largura'], cache['altura'])
+        cap = abrir_camera(cache['indice'], resolucao, **configuracao)
+        configuracao['resolucao'] = resolucao
+        if cap is not None:
+            print(f"✓ Câmera conectada no índice {cache['indice']} ({descrever_captura(cap)})")
+            return cap
+        print("✗ Câmera do cache indisponível. Procurando outras...")
+
+    print(f"Testando câmeras nos índices {', '.join(map(str, indices))}...")
+    executor = ThreadPoolExecutor(max_workers=len(indices))
+    futuros = {executor.submit(abrir_camera, indice, **configuracao): indice for indice in indices}
+    cap, indice = None, None
+    for futuro in as_completed(futuros):
+        cap = futuro.result()
+        if cap is not None:
+            indice = futuros[futuro]
+            break
+        print(f"✗ Câmera no índice {futuros[futuro]} indisponível ou instável")
+
+    # As outras sondagens terminam em segundo plano e liberam o que abriram
+    for futuro in futuros:
+        if futuros[futuro] != indice:
+            futuro.add_done_callback(_liberar_se_aberta)
+    executor.shutdown(wait=False)
+
+    if cap is not None:
+        largura = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        altura = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        print(f"✓ Câmera funcionando corretamente no índice {indice} ({descrever_captura(cap)})")
+        salvar_cache(camera={'indice': indice, 'largura': largura, 'altura': altura})
+        return cap
 
-def processar_sequencia_comandos(codigos_ordenados, mostrar_console=True, 
-                                cartas_anteriores_j1=None, cartas_anteriores_j2=None):
-    """Processa QR codes e retorna sequências válidas."""
-    cartas_anteriores_j1 = cartas_anteriores_j1 or []
-    cartas_anteriores_j2 = cartas_anteriores_j2 or []
-    
-    # Extrai textos
-    textos = extrair_textos_qr(codigos_ordenados)
-    
-    # Separa por usuário
-    cartas_usuario1 = [t for t in textos if t.startswith("1-")]
-    cartas_usuario2 = [t for t in textos if t.startswith("2-")]
-    
-    # Mostra no console se mudou
-    if mostrar_console:
-        if (set(cartas_usuario1) != set(cartas_anteriores_j1) or 
-            set(cartas_usuario2) != set(cartas_anteriores_j2) or 
-            (not cartas_usuario1 and not cartas_usuario2)):
-            print("\nCartas que estão na tela:")
-            for usuario, cartas in [("1", cartas_usuario1), ("2", cartas_usuario2)]:
-                comandos = [c.split('-')[1].capitalize() for c in cartas if '-' in c] if cartas else ["Nenhuma"]
-                print(f"Usuario {usuario} - {', '.join(comandos)}")
-            print("="*60)
-    
-    # Extrai sequências válidas
-    sequencias = {}
-    for jogador in ["1", "2"]:
-        comandos = extrair_comandos_jogador(textos, jogador)
-        if comandos:
-            sequencias[jogador] = comandos
-    
-    return sequencias, cartas_usuario1, cartas_usuario2
-
-
-def inicializar_camera():
-    """Tenta inicializar a câmera em diferentes índices."""
-    for camera_index in range(3):
-        print(f"Tentando câmera no índice {camera_index}...")
-        cap = cv2.VideoCapture(camera_index)
-        
-        if cap.isOpened():
-            print(f"Câmera conectada no índice {camera_index}")
-            
-            # Configura autofoco (se disponível)
-            try:
-                cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)  # Ativa autofoco
-                cap.set(cv2.CAP_PROP_FOCUS, 0)      # Reset para autofoco automático
-                print("✓ Autofoco ativado")
-            except:
-                print("⚠️ Autofoco não disponível nesta câmera")
-            
-            time.sleep(2)
-            
-            # Testa estabilidade da câmera
-            frames_ok = sum(1 for _ in range(5) if cap.read()[0] or not time.sleep(0.1))
-            
-            if frames_ok >= 3:
-                print(f"✓ Câmera funcionando corretamente! ({frames_ok}/5 frames capturados)")
-                return cap
-            
-            print(f"✗ Câmera no índice {camera_index} instável ({frames_ok}/5 frames). Tentando próxima...")
-            cap.release()
-    
     print("\n❌ Não foi possível acessar nenhuma câmera.")
     print("Possíveis soluções:")
     print("1. Verifique as permissões em: Configurações do Sistema > Privacidade e Segurança > Câmera")
@@ -117,240 +190,324 @@ def liberar_camera(cap):
     print("✓ Jogo encerrado com sucesso!\n")
 
 
-def carregar_recursos(tamanho_celula, largura, altura):
-    """Carrega todas as imagens e recursos do jogo."""
+# Imagens e cores dos personagens; com mais jogadores do que itens, as listas se repetem
+IMAGENS_PERSONAGENS = ["imagens/usuario1.png", "imagens/usuario2.png"]
+PALETA_JOGADORES = [(0, 255, 0), (0, 100, 255), (255, 0, 0), (0, 255, 255),
+                    (255, 0, 255), (255, 255, 0), (0, 0, 255), (255, 255, 255)]
+
+
+class FundosFases(dict):
+    """Fundo de cada fase ({número: imagem}), carregado do cache de recursos no primeiro uso."""
+
+    def __init__(self, cache, largura, altura):
+        super().__init__()
+        self.cache, self.largura, self.altura = cache, largura, altura
+
+    def __missing__(self, fase):
+        caminho = f"imagens/fase{fase}_background.png"
+
+        def construir():
+            fundo = cv2.imread(caminho)
+            return {'fundo': cv2.resize(fundo, (self.largura, self.altura))} if fundo is not None else None
+
+        arrays = self.cache.obter(caminho, (self.largura, self.altura), construir)
+        if arrays is not None:
+            fundo = arrays['fundo']
+            print(f"✓ Fundo da fase {fase} carregado!")
+        else:
+            print(f"⚠️ Aviso: '{caminho}' não encontrado. Usando fundo branco.")
+            fundo = np.full((self.altura, self.largura, 3), 255, dtype=np.uint8)
+        self[fase] = fundo
+        return fundo
+
+
+def carregar_recursos(tamanho_celula, largura, altura, fase=1, jogadores=2):
+    """Carrega todas as imagens e recursos do jogo (já preparados, do cache de recursos).
+
+    Cada um dos `jogadores` tem seu personagem, com o selo do número na cor do jogador (as imagens
+    se repetem quando há mais jogadores do que imagens).
+    """
+    cache = CacheRecursos()
     recursos = {
-        'personagem1': carregar_imagem("imagens/usuario1.png", tamanho_celula),
-        'personagem2': carregar_imagem("imagens/usuario2.png", tamanho_celula),
-        'destino': carregar_imagem("imagens/casa.png", tamanho_celula)
+        'personagens': [carregar_sprite(IMAGENS_PERSONAGENS[i % len(IMAGENS_PERSONAGENS)], tamanho_celula, cache,
+                                        marca=(i + 1, PALETA_JOGADORES[i % len(PALETA_JOGADORES)]))
+                        for i in range(jogadores)],
+        'destino': carregar_sprite("imagens/casa.png", tamanho_celula, cache),
+        'fases': FundosFases(cache, largura, altura),
     }
-    
-    # Carrega fundo
-    fundo = cv2.imread("imagens/fase1_background.png")
-    if fundo is not None:
-        recursos['fundo'] = cv2.resize(fundo, (largura, altura))
-        print("✓ Fundo carregado!")
-    else:
-        print("⚠️ Aviso: 'imagens/fase1_background.png' não encontrado. Usando fundo branco.")
-        recursos['fundo'] = np.full((altura, largura, 3), 255, dtype=np.uint8)
-    
+    recursos['fundo'] = recursos['fases'][fase]
+    if cache.gerados:
+        print(f"✓ Cache de recursos atualizado ({cache.gerados} recursos preparados)")
     return recursos
 
 
-def desenhar_mensagem_executando(tela, largura, altura, usuario, cor):
-    """Desenha mensagem de execução centralizada na tela."""
-    overlay = tela.copy()
-    cv2.rectangle(overlay, (0, altura//2 - 100), (largura, altura//2 + 100), (0, 0, 0), -1)
-    cv2.addWeighted(overlay, 0.7, tela, 0.3, 0, tela)
-    
-    texto1, texto2 = "Analisando caminho", f"Usuario {usuario}"
-    (w1, _), _ = cv2.getTextSize(texto1, cv2.FONT_HERSHEY_SIMPLEX, 2.5, 6)
-    (w2, _), _ = cv2.getTextSize(texto2, cv2.FONT_HERSHEY_SIMPLEX, 2.5, 6)
-    
-    y_centro = altura // 2
-    cv2.putText(tela, texto1, ((largura - w1) // 2, y_centro - 40), 
-               cv2.FONT_HERSHEY_SIMPLEX, 2.5, (255, 255, 255), 6)
-    cv2.putText(tela, texto2, ((largura - w2) // 2, y_centro + 60), 
-               cv2.FONT_HERSHEY_SIMPLEX, 2.5, cor, 6)
-
-
-def desenhar_cenario(tela, destino, destino_img, tamanho_celula):
-    """Desenha destino no cenário."""
-    # Desenha destino (apenas a imagem, sem quadrado amarelo)
-    if destino_img is not None:
-        dx, dy = destino
-        x_destino, y_destino = dx * tamanho_celula, dy * tamanho_celula
-        overlay_image(tela, destino_img, x_destino, y_destino)
-
-
-def executar_movimento(pos_x, pos_y, direcao, grid_cols, grid_rows):
-    """Executa um movimento e retorna nova posição."""
-    if direcao == "direita":
-        return min(pos_x + 1, grid_cols - 1), pos_y
-    elif direcao == "esquerda":
-        return max(pos_x - 1, 0), pos_y
-    elif direcao == "cima":
-        return pos_x, max(pos_y - 1, 0)
-    elif direcao == "baixo":
-        return pos_x, min(pos_y + 1, grid_rows - 1)
-    return pos_x, pos_y
+def escolher_backend(obter_frames):
+    """Usa o decodificador do cache; sem cache (ou com QRGAME_CALIBRAR=1), calibra com frames reais.
+
+    `obter_frames` só é chamada quando é preciso calibrar e retorna a lista de frames.
+    """
+    nome = ler_cache().get('backend')
+    if nome in BACKENDS and os.environ.get("QRGAME_CALIBRAR") != "1":
+        try:
+            backend = BACKENDS[nome]()
+            print(f"✓ Decodificador do cache: {nome}")
+            return backend
+        except ImportError:
+            pass
+
+    # Escolhe o decodificador mais rápido nesta máquina usando frames reais
+    backend = calibrar_backend(obter_frames())
+    salvar_cache(backend=backend.nome)
+    return backend
+
+
+def frames_de_calibracao(cap, quantidade=5):
+    return [frame for ret, frame in (cap.read() for _ in range(quantidade)) if ret]
+
+
+def inicializar_cameras(indices, transformacoes=None, configuracao=None, tamanho_preview=(320, 240)):
+    """Abre várias câmeras, cada uma decodificada em um processo próprio. Retorna a captura ou None."""
+    print(f"Abrindo câmeras nos índices {', '.join(map(str, indices))} (um processo por câmera)...")
+    captura = CapturaMulticamera(indices, transformacoes, configuracao=configuracao,
+                                 tamanho_mosaico=tamanho_preview).iniciar()
+    if captura is None:
+        print("\n❌ Não foi possível abrir todas as câmeras pedidas.")
+        return None
+
+    def obter_frames():
+        frames = []
+        for _ in range(2):
+            frames += [captura.frame(indice) for indice in indices]
+            time.sleep(0.1)
+        return frames
+
+    captura.definir_backend(escolher_backend(obter_frames).nome)
+    return captura
+
+
+def ler_tamanho(texto):
+    """Converte "LARGURAxALTURA" em (largura, altura); "padrao" mantém o da câmera (None)."""
+    if texto == "padrao":
+        return None
+    try:
+        largura, altura = (int(v) for v in texto.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: {texto!r} (use LARGURAxALTURA, ex.: 1280x720)")
+    if largura <= 0 or altura <= 0:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: {texto!r} (largura e altura devem ser positivas)")
+    return largura, altura
 
 
 def main():
-    # Inicializa câmera
-    cap = inicializar_camera()
-    if cap is None:
-        return
+    parser = argparse.ArgumentParser(
+        description="Jogo por QR Code: cada jogador monta sua sequência de cartas para chegar ao destino.")
+    parser.add_argument('--jogadores', type=int, default=2,
+                        help='Número de jogadores (padrão: 2)')
+    parser.add_argument('--cameras', type=int, nargs='+', metavar='INDICE',
+                        help='Índices das câmeras; com mais de uma, cada câmera roda em um processo próprio')
+    parser.add_argument('--transformacoes', metavar='ARQUIVO',
+                        help='JSON com o deslocamento ou a homografia de cada câmera na mesa '
+                             '(padrão: câmeras lado a lado)')
+    parser.add_argument('--sessao', metavar='ARQUIVO',
+                        help='Grava a partida (leituras, estados e movimentos) no arquivo binário de sessões')
+    parser.add_argument('--sessao-imagens', type=int, default=0, metavar='N',
+                        help='Com --sessao, grava também uma miniatura JPEG a cada N frames (padrão: 0, desligado)')
+    parser.add_argument('--resolucao', type=ler_tamanho, default=(1280, 720), metavar='LxA',
+                        help='Resolução de captura usada na decodificação (padrão: 1280x720; '
+                             '"padrao" mantém a da câmera)')
+    parser.add_argument('--formato', default='MJPG',
+                        help='Formato (FOURCC) pedido à câmera (padrão: MJPG; "padrao" mantém o da câmera)')
+    parser.add_argument('--preview', type=ler_tamanho, default=(320, 240), metavar='LxA',
+                        help='Tamanho do preview da câmera na tela (padrão: 320x240)')
+    parser.add_argument('--preview-rapido', action='store_true',
+                        help='Reduz o preview por vizinho mais próximo (mais barato, mais serrilhado)')
+    args = parser.parse_args()
+    if args.jogadores < 1:
+        parser.error("--jogadores deve ser pelo menos 1")
+    multicamera = args.cameras is not None and len(args.cameras) > 1
+    if args.transformacoes and not multicamera:
+        parser.error("--transformacoes só se aplica com mais de uma câmera em --cameras")
 
     # Configurações do jogo
     LARGURA, ALTURA = 1280, 960
     TAMANHO_CELULA = 128
     grid_cols, grid_rows = LARGURA // TAMANHO_CELULA, ALTURA // TAMANHO_CELULA
-    
+
     # Preview da câmera
-    PREVIEW_CONFIG = {'largura': 320, 'altura': 240, 'x': 20, 'y': 20}
+    if args.preview is None:
+        parser.error("--preview precisa de um tamanho LARGURAxALTURA")
+    PREVIEW_CONFIG = {'largura': args.preview[0], 'altura': args.preview[1], 'x': 20, 'y': 20}
+    if (PREVIEW_CONFIG['x'] + PREVIEW_CONFIG['largura'] > LARGURA
+            or PREVIEW_CONFIG['y'] + PREVIEW_CONFIG['altura'] > ALTURA):
+        parser.error(f"--preview deve caber na tela: até {LARGURA - PREVIEW_CONFIG['x']}x"
+                     f"{ALTURA - PREVIEW_CONFIG['y']} (tela {LARGURA}x{ALTURA})")
+    if args.formato != 'padrao' and len(args.formato) != 4:
+        parser.error("--formato deve ter 4 caracteres (ex.: MJPG, YUYV)")
+
+    inicio = time.perf_counter()
+
+    # Captura na resolução de decodificação; o preview é reduzido dela separadamente
+    CONFIG_CAPTURA = {'resolucao': args.resolucao, 'formato': None if args.formato == 'padrao' else args.formato}
+
+    # Inicializa câmera(s)
+    if multicamera:
+        transformacoes = carregar_transformacoes(args.transformacoes) if args.transformacoes else None
+        cap, captura = None, inicializar_cameras(args.cameras, transformacoes, CONFIG_CAPTURA, args.preview)
+        if captura is None:
+            return
+    else:
+        cap = inicializar_camera(args.cameras or range(3), CONFIG_CAPTURA)
+        if cap is None:
+            return
+    print(f"⏱️  Câmera pronta em {time.perf_counter() - inicio:.2f} s")
+
+    # Taxa de desenho da tela (a animação dos personagens não depende do fps da câmera);
+    # sem cartas novas, animação nem movimento na câmera, a tela cai para FPS_OCIOSO
+    FPS_ALVO = 60
+    FPS_OCIOSO = 5
+
+    JANELA = f"Jogo por QR Code - {args.jogadores} Jogadores"
     
     # Carrega recursos
-    recursos = carregar_recursos(TAMANHO_CELULA, LARGURA, ALTURA)
-    
-    # Configuração do cenário
-    destino = (grid_cols - 1, 0)
-    
-    # Posições iniciais
-    pos1 = [0, grid_rows - 1]
-    pos2 = [0, grid_rows - 1]
-    
-    # Estado do jogo
-    estado = {
-        'sequencia_j1_processada': False,
-        'sequencia_j2_processada': False,
-        'aguardando_ambas': True,
-        'executando_j1': False,
-        'executando_j2': False,
-        'jogo_ativo': True,
-        'vencedor': None
-    }
-    
-    # Filas de comandos
-    fila_j1, fila_j2 = [], []
-    tempo_ultimo_movimento = time.time()
+    recursos = carregar_recursos(TAMANHO_CELULA, LARGURA, ALTURA, jogadores=args.jogadores)
+
+    if not multicamera:
+        backend = escolher_backend(lambda: frames_de_calibracao(cap))
     
-    # Controle de console e estabilização
-    tempo_ultima_atualizacao_console = time.time()
-    cartas_anteriores_j1, cartas_anteriores_j2 = [], []
-    cartas_estavel_j1, cartas_estavel_j2 = [], []
-    contagem_estavel_j1, contagem_estavel_j2 = 0, 0
-    FRAMES_NECESSARIOS = 5
+    # Estado da partida (posições, filas e estabilização)
+    jogo = criar_jogo(grid_cols, grid_rows, time.time(), num_jogadores=args.jogadores)
+    estado = jogo['estado']
+    sessao = GravadorSessao(args.sessao, jogo, time.time(), args.sessao_imagens) if args.sessao else None
+
+    # Sprite e cor da faixa de execução de cada jogador
+    sprites = recursos['personagens']
+    cores_jogadores = {jogador: PALETA_JOGADORES[i % len(PALETA_JOGADORES)]
+                       for i, jogador in enumerate(jogo['jogadores'])}
+    renderizador = Renderizador(recursos, LARGURA, ALTURA, TAMANHO_CELULA, jogo['destino'],
+                                PREVIEW_CONFIG, cores_jogadores)
+    preview_camera = PreviewCamera(PREVIEW_CONFIG['largura'], PREVIEW_CONFIG['altura'],
+                                   cv2.INTER_NEAREST if args.preview_rapido else cv2.INTER_LINEAR)
     
     print("\n✓ Iniciando jogo...")
-    print("✓ Pressione 'q' para sair\n")
+    print("✓ Pressione 'q' para sair, 'h' para o HUD de desempenho e 'p' para o profiler\n")
     
     # Cria janela maximizada
-    cv2.namedWindow("Jogo por QR Code - 2 Jogadores", cv2.WINDOW_NORMAL)
-    cv2.setWindowProperty("Jogo por QR Code - 2 Jogadores", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    cv2.namedWindow(JANELA, cv2.WINDOW_NORMAL)
+    cv2.setWindowProperty(JANELA, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+
+    # Pipeline: captura e decodificação rodam em threads separadas da renderização
+    # (com várias câmeras, em processos; a mesma captura faz o papel de decodificador e agendador)
+    instrumentacao = Instrumentacao()
+    if multicamera:
+        agendador = decodificador = captura
+    else:
+        captura = CapturaAssincrona(cap, instrumentacao).iniciar()
+        agendador = AgendadorDecodificacao()
+        decodificador = DecodificadorAssincrono(captura, DecodificadorQR(backend), agendador=agendador,
+                                                instrumentacao=instrumentacao).iniciar()
+    medidor = MedidorLatencia()
+    governador = GovernadorQuadros(FPS_ALVO, FPS_OCIOSO)
+
+    def despertar():
+        """Movimento na câmera ou cartas diferentes das últimas lidas tiram o loop do modo ocioso."""
+        ultimo = decodificador.ultimo_resultado()
+        return (agendador.tempo_ultimo_movimento > governador.ultima_atividade
+                or (ultimo is not None and governador.cartas_mudaram(ultimo.codigos)))
+
+    id_frame, id_resultado = 0, 0
+    preview = None
+    primeiro_quadro = True
 
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Erro ao capturar frame da câmera")
-            break
-
-        codigos = decode(frame)
-        frame_invertido = cv2.flip(frame, 1)
-
-        # Processa QR codes
-        if estado['jogo_ativo'] and codigos and estado['aguardando_ambas']:
-            codigos_ordenados = sorted(codigos, key=lambda c: c.rect.left)
-            tempo_atual = time.time()
-            mostrar_no_console = (tempo_atual - tempo_ultima_atualizacao_console) >= 1.0
-            
-            sequencias, cartas_u1, cartas_u2 = processar_sequencia_comandos(
-                codigos_ordenados, False, cartas_anteriores_j1, cartas_anteriores_j2)
-            
-            # Estabilização
-            contagem_estavel_j1 = contagem_estavel_j1 + 1 if set(cartas_u1) == set(cartas_estavel_j1) else 1
-            contagem_estavel_j2 = contagem_estavel_j2 + 1 if set(cartas_u2) == set(cartas_estavel_j2) else 1
-            cartas_estavel_j1, cartas_estavel_j2 = cartas_u1, cartas_u2
-            
-            # Atualiza console se estável
-            if mostrar_no_console:
-                mudou_j1 = set(cartas_estavel_j1) != set(cartas_anteriores_j1) and contagem_estavel_j1 >= FRAMES_NECESSARIOS
-                mudou_j2 = set(cartas_estavel_j2) != set(cartas_anteriores_j2) and contagem_estavel_j2 >= FRAMES_NECESSARIOS
-                
-                if mudou_j1 or mudou_j2:
-                    print("\nCartas que estão na tela:")
-                    for i, cartas in enumerate([cartas_estavel_j1, cartas_estavel_j2], 1):
-                        cmd = [c.split('-')[1].capitalize() for c in cartas if '-' in c] if cartas else ["Nenhuma"]
-                        print(f"Usuario {i} - {', '.join(cmd)}")
-                    print("="*60)
-                    cartas_anteriores_j1, cartas_anteriores_j2 = cartas_estavel_j1.copy(), cartas_estavel_j2.copy()
-                
-                tempo_ultima_atualizacao_console = tempo_atual
-            
-            # Captura sequências
-            if "1" in sequencias and not estado['sequencia_j1_processada']:
-                fila_j1 = sequencias["1"].copy()
-                estado['sequencia_j1_processada'] = True
-                print(f"✓ Sequência completa capturada do Usuario 1: {sequencias['1']}")
-            
-            if "2" in sequencias and not estado['sequencia_j2_processada']:
-                fila_j2 = sequencias["2"].copy()
-                estado['sequencia_j2_processada'] = True
-                print(f"✓ Sequência completa capturada do Usuario 2: {sequencias['2']}")
-            
-            if estado['sequencia_j1_processada'] and estado['sequencia_j2_processada']:
-                estado['aguardando_ambas'] = False
-                estado['executando_j1'] = True
-                print("\n🎬 Iniciando execução dos movimentos...")
-        
-        # Executa movimentos
-        if estado['jogo_ativo'] and time.time() - tempo_ultimo_movimento > 0.8:
-            if estado['executando_j1'] and fila_j1:
-                pos1[0], pos1[1] = executar_movimento(pos1[0], pos1[1], fila_j1.pop(0), grid_cols, grid_rows)
-                tempo_ultimo_movimento = time.time()
-                if not fila_j1:
-                    estado['executando_j1'], estado['executando_j2'] = False, True
-            
-            elif estado['executando_j2'] and fila_j2:
-                pos2[0], pos2[1] = executar_movimento(pos2[0], pos2[1], fila_j2.pop(0), grid_cols, grid_rows)
-                tempo_ultimo_movimento = time.time()
-
-        # Renderiza tela
-        tela = recursos['fundo'].copy()
-        
-        # Mensagens
-        if estado['aguardando_ambas']:
-            pass  # Removido: desenhar_mensagem_aguardando
-        elif estado['executando_j1']:
-            desenhar_mensagem_executando(tela, LARGURA, ALTURA, "1", (0, 255, 0))
-        elif estado['executando_j2']:
-            desenhar_mensagem_executando(tela, LARGURA, ALTURA, "2", (0, 100, 255))
-
-        # Cenário
-        desenhar_cenario(tela, destino, recursos['destino'], TAMANHO_CELULA)
-        
-        # Personagens
-        overlay_image(tela, recursos['personagem1'], pos1[0] * TAMANHO_CELULA, pos1[1] * TAMANHO_CELULA)
-        overlay_image(tela, recursos['personagem2'], pos2[0] * TAMANHO_CELULA, pos2[1] * TAMANHO_CELULA)
-
-        # Vitória
-        if estado['jogo_ativo']:
-            if tuple(pos1) == destino:
-                estado['jogo_ativo'], estado['vencedor'] = False, "Jogador 1"
-            elif tuple(pos2) == destino:
-                estado['jogo_ativo'], estado['vencedor'] = False, "Jogador 2"
-        
-        if estado['vencedor']:
-            cv2.putText(tela, f"{estado['vencedor']} venceu!", (300, 480), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 3.0, (0, 150, 0), 6)
-
-        # Preview da câmera
-        preview = cv2.resize(frame_invertido, (PREVIEW_CONFIG['largura'], PREVIEW_CONFIG['altura']))
-        y, x = PREVIEW_CONFIG['y'], PREVIEW_CONFIG['x']
-        tela[y:y+PREVIEW_CONFIG['altura'], x:x+PREVIEW_CONFIG['largura']] = preview
-
-        cv2.imshow("Jogo por QR Code - 2 Jogadores", tela)
-
-        if cv2.waitKey(1) & 0xFF == ord('q') or \
-           cv2.getWindowProperty("Jogo por QR Code - 2 Jogadores", cv2.WND_PROP_VISIBLE) < 1:
+        inicio_quadro = t = instrumentacao.marcar()
+        # Espera no máximo um quadro de 60 fps: sem frame novo, a animação segue com o preview anterior
+        with captura.emprestar_frame(id_frame, timeout=1 / FPS_ALVO) as item:
+            if item is not None:
+                t = instrumentacao.registrar("espera_frame", t)
+                # O buffer da câmera só é usado aqui; o preview é reduzido para um buffer próprio
+                frame, id_frame, _ = item
+                preview = preview_camera.atualizar(frame)
+                if sessao is not None:
+                    sessao.registrar_imagem(time.time(), id_frame, frame)
+                t = instrumentacao.registrar("preview", t)
+        if item is None:
+            if captura.falhou:
+                print("Erro ao capturar frame da câmera")
+                break
+            if preview is None:
+                continue
+            t = instrumentacao.registrar("espera_frame", t)
+
+        # Só decodifica enquanto o jogo aguarda as sequências
+        agendador.definir_ativo(aguardando_cartas(jogo))
+
+        # Usa apenas resultados de decodificação ainda não processados
+        resultado = decodificador.ultimo_resultado()
+        novo_resultado = resultado is not None and resultado.id_frame != id_resultado
+        codigos = resultado.codigos if novo_resultado else []
+        if novo_resultado:
+            id_resultado = resultado.id_frame
+
+        # Processa QR codes; movimentos e vitória avançam em ticks fixos até agora
+        agora = time.time()
+        eventos = atualizar_jogo(jogo, codigos, agora)
+        if sessao is not None and (novo_resultado or eventos):
+            sessao.registrar(agora, resultado.id_frame if novo_resultado else 0,
+                             codigos if novo_resultado else None, eventos, estado)
+        t = instrumentacao.registrar("jogo", t)
+
+        # Renderiza tela (apenas as regiões que mudaram)
+        banner = jogador_da_vez(jogo)
+        pixels = np.rint(posicoes_interpoladas(jogo) * TAMANHO_CELULA).astype(int).tolist()
+        personagens = [(sprite, x, y) for sprite, (x, y) in zip(sprites, pixels)]
+        tela = renderizador.desenhar(banner, personagens, estado['vencedor'], preview)
+
+        # HUD de desempenho (restaurado pelo renderizador no próximo quadro)
+        rect_hud = instrumentacao.desenhar_hud(tela)
+        if rect_hud:
+            renderizador.invalidar(rect_hud)
+        t = instrumentacao.registrar("composicao", t)
+
+        cv2.imshow(JANELA, tela)
+        t = instrumentacao.registrar("exibicao", t)
+
+        # Animação, troca de faixa, cartas novas, movimentos na fila ou HUD mantêm o fps alvo;
+        # sem nada disso (inclusive com a faixa do último jogador parada no fim da rodada), modo ocioso
+        governador.observar((banner, tuple(map(tuple, pixels)), estado['vencedor']),
+                            codigos if novo_resultado else None)
+        if rect_hud or (estado['jogo_ativo'] and any(jogo['filas'])):
+            governador.registrar_atividade()
+        tecla = governador.aguardar(inicio_quadro, despertar)
+        instrumentacao.registrar("espera_janela", t)
+        if primeiro_quadro:
+            print(f"⏱️  Inicialização completa em {time.perf_counter() - inicio:.2f} s (até o primeiro quadro)")
+            primeiro_quadro = False
+
+        if novo_resultado:
+            medidor.registrar_latencia(resultado.tempo_captura)
+        medidor.registrar_quadro(decodificador)
+        instrumentacao.registrar("quadro", inicio_quadro)
+        instrumentacao.atualizar()
+
+        if tecla == ord('h'):
+            instrumentacao.alternar_hud()
+        elif tecla == ord('p'):
+            instrumentacao.alternar_profiler()
+
+        if tecla == ord('q') or \
+           cv2.getWindowProperty(JANELA, cv2.WND_PROP_VISIBLE) < 1:
             break
 
+    instrumentacao.encerrar()
+    print(governador.relatorio())
+    if sessao is not None:
+        sessao.fechar()
+        print(f"✓ Sessão gravada em '{args.sessao}'")
+    if not multicamera:
+        decodificador.parar()
+    captura.parar()
     liberar_camera(cap)
 
 
-def overlay_image(fundo, imagem, x, y):
-    """Desenha imagem PNG (com transparência) sobre o fundo."""
-    h, w = imagem.shape[:2]
-    if imagem.shape[2] == 4:
-        alpha_s = imagem[:, :, 3] / 255.0
-        alpha_l = 1.0 - alpha_s
-
-        for c in range(3):
-            fundo[y:y+h, x:x+w, c] = (alpha_s * imagem[:, :, c] +
-                                      alpha_l * fundo[y:y+h, x:x+w, c])
-    else:
-        fundo[y:y+h, x:x+w] = imagem
-
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,316 @@
+"""
+Captura com várias câmeras, uma por processo.
+
+Cada câmera roda em um processo próprio que lê os frames, decide com o
+agendador se precisa decodificar e roda o DecodificadorQR, então vários
+streams 1080p decodificam em paralelo sem disputar o GIL. Os frames ficam em
+memória compartilhada (dois buffers por câmera, alternados): o processo
+principal só copia uma versão reduzida de cada um para o mosaico do preview,
+sem serializar imagens. Pela fila de cada câmera trafegam apenas as leituras.
+
+As leituras de cada câmera são levadas para um sistema de coordenadas comum
+da mesa (deslocamento ou homografia por câmera) e mescladas em uma única lista
+ordenada da esquerda para a direita; uma carta vista por duas câmeras na
+emenda entre elas aparece uma vez só.
+
+Arquivo de transformações (JSON), por índice de câmera:
+    {"0": {"deslocamento": [0, 0]},
+     "1": {"deslocamento": [1800, 0]},
+     "2": {"homografia": [[1, 0, 3600], [0, 1, 0], [0, 0, 1]]}}
+Sem arquivo, as câmeras são consideradas lado a lado, na ordem informada.
+"""
+
+import json
+import multiprocessing
+import queue
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from captura import ResultadoDeteccao
+from deteccao import INATIVO, REAPROVEITAR, CodigoQR, Retangulo, iou
+
+
+def _trabalhador(indice, configuracao, fila, parar, ativo, nome_backend, id_frame, trava, movimento):
+    """Processo de uma câmera: captura em memória compartilhada e decodificação."""
+    # Importados aqui: o processo filho (spawn) carrega só o necessário
+    from deteccao import BACKENDS, AgendadorDecodificacao, DecodificadorQR
+    from main import abrir_camera
+
+    cap = abrir_camera(indice, **configuracao)
+    if cap is None:
+        fila.put(("falhou", indice))
+        return
+    ret, frame = cap.read()
+    if not ret:
+        cap.release()
+        fila.put(("falhou", indice))
+        return
+
+    memoria = shared_memory.SharedMemory(create=True, size=2 * frame.nbytes)
+    buffers = np.ndarray((2, *frame.shape), dtype=np.uint8, buffer=memoria.buf)
+    fila.put(("pronta", indice, memoria.name, frame.shape))
+
+    agendador = AgendadorDecodificacao()
+    decodificador, backend_atual = None, None
+    atual = 0
+    try:
+        while not parar.is_set():
+            # A câmera escreve sempre no buffer que não é o mais recente
+            livre = 1 - atual
+            ret, _ = cap.read(buffers[livre])
+            tempo = time.perf_counter()  # Relógio monotônico do sistema, comparável entre processos
+            if not ret:
+                fila.put(("falhou", indice))
+                break
+            with trava:
+                atual = livre
+                id_frame.value += 1
+                frame_id = id_frame.value
+
+            agendador.definir_ativo(bool(ativo.value))
+            decisao = agendador.avaliar(buffers[atual])
+            movimento.value = agendador.tempo_ultimo_movimento  # Acorda o modo ocioso do processo principal
+            if decisao == INATIVO:
+                continue
+            if decisao == REAPROVEITAR:
+                # Imagem parada: as mesmas cartas, confirmadas mais uma vez (sem rodar o zbar)
+                leituras = None if decodificador is None else \
+                    [(c.data, tuple(c.rect), c.confianca, c.id) for c in decodificador.confirmar()]
+                fila.put(("pulado", indice, frame_id, tempo, leituras))
+                continue
+
+            nome = nome_backend.value.decode()
+            if nome != backend_atual:
+                decodificador, backend_atual = DecodificadorQR(BACKENDS[nome]()), nome
+            inicio = time.perf_counter()
+            codigos = decodificador(buffers[atual])
+            fila.put(("codigos", indice, frame_id, tempo, time.perf_counter() - inicio,
+                      [(c.data, tuple(c.rect), c.confianca, c.id) for c in codigos]))
+    finally:
+        cap.release()
+        memoria.close()
+        memoria.unlink()
+
+
+def carregar_transformacoes(caminho):
+    """Lê o arquivo JSON de transformações ({índice: {"deslocamento" | "homografia": ...}})."""
+    with open(caminho, encoding="utf-8") as arquivo:
+        return {int(indice): config for indice, config in json.load(arquivo).items()}
+
+
+def matriz_transformacao(config):
+    """Homografia 3x3 de uma configuração de câmera (deslocamento ou homografia)."""
+    if 'homografia' in config:
+        return np.array(config['homografia'], dtype=np.float64)
+    dx, dy = config.get('deslocamento', (0, 0))
+    return np.array([[1, 0, dx], [0, 1, dy], [0, 0, 1]], dtype=np.float64)
+
+
+def transformar_retangulo(rect, matriz):
+    """Retângulo envolvente de `rect` levado às coordenadas da mesa."""
+    x, y, w, h = rect
+    cantos = np.array([[[x, y], [x + w, y], [x + w, y + h], [x, y + h]]], dtype=np.float32)
+    pontos = cv2.perspectiveTransform(cantos, matriz)
+    return Retangulo(*cv2.boundingRect(pontos))
+
+
+def mesclar_deteccoes(deteccoes, matrizes, limiar_iou=0.3):
+    """Une as leituras das câmeras ({índice: [CodigoQR]}) em uma lista ordenada da esquerda para a direita.
+
+    Uma mesma carta lida por duas câmeras (mesmo conteúdo e retângulos
+    sobrepostos na mesa) fica só com a leitura de maior confiança.
+    """
+    mescladas = []
+    for indice, codigos in deteccoes.items():
+        for codigo in codigos:
+            rect = transformar_retangulo(codigo.rect, matrizes[indice])
+            candidato = CodigoQR(codigo.data, rect, codigo.confianca, (indice, codigo.id))
+            for i, outro in enumerate(mescladas):
+                if outro.data == candidato.data and iou(outro.rect, candidato.rect) >= limiar_iou:
+                    if candidato.confianca > outro.confianca:
+                        mescladas[i] = candidato
+                    break
+            else:
+                mescladas.append(candidato)
+    return sorted(mescladas, key=lambda c: c.rect.left)
+
+
+class CapturaMulticamera:
+    """Várias câmeras em processos separados, com a mesma interface usada pelo loop do jogo.
+
+    Faz o papel da captura (`emprestar_frame`, com um mosaico reduzido das
+    câmeras no tamanho `tamanho_mosaico`), do decodificador (`ultimo_resultado`,
+    contadores) e do agendador (`definir_ativo`, `tempo_ultimo_movimento`).
+    """
+
+    def __init__(self, indices, transformacoes=None, backend="opencv", tamanho_mosaico=(320, 240),
+                 tempo_limite=10.0, configuracao=None):
+        self.indices = list(indices)
+        self.transformacoes = transformacoes or {}
+        self.configuracao = configuracao or {}  # Repassada a main.abrir_camera (resolução, formato)
+        self.tamanho_mosaico = tamanho_mosaico  # (largura, altura), normalmente o tamanho do preview
+        self.tempo_limite = tempo_limite
+        self.falhou = False
+        self.decodificados = 0
+        self.pulados = 0
+        self.funcao_decodificar = None
+
+        self._contexto = multiprocessing.get_context("spawn")  # fork + threads do OpenCV pode travar
+        self._parar = self._contexto.Event()
+        self._ativo = self._contexto.Value('b', 1, lock=False)
+        self._backend = self._contexto.Array('c', 16, lock=False)
+        self._backend.value = backend.encode()
+        self._filas, self._ids, self._travas, self._processos = {}, {}, {}, {}
+        self._movimentos = {}  # perf_counter do último movimento visto por cada câmera
+        self._memorias, self._buffers, self._matrizes = {}, {}, {}
+        self._deteccoes = {indice: [] for indice in self.indices}
+        self._resultado = None
+        self._id_resultado = 0
+        self._mosaico = None
+        self._regioes = {}  # Fatias (linhas, colunas) do mosaico de cada câmera
+
+    def iniciar(self):
+        """Inicia um processo por câmera e espera todas ficarem prontas. Retorna self ou None."""
+        for indice in self.indices:
+            fila = self._contexto.Queue()
+            id_frame = self._contexto.Value('q', 0, lock=False)
+            trava = self._contexto.Lock()
+            movimento = self._contexto.Value('d', 0.0, lock=False)
+            processo = self._contexto.Process(
+                target=_trabalhador, name=f"camera-{indice}", daemon=True,
+                args=(indice, self.configuracao, fila, self._parar, self._ativo, self._backend, id_frame, trava,
+                      movimento))
+            processo.start()
+            self._filas[indice], self._ids[indice], self._travas[indice] = fila, id_frame, trava
+            self._movimentos[indice] = movimento
+            self._processos[indice] = processo
+
+        formas = {}
+        limite = time.perf_counter() + self.tempo_limite
+        for indice in self.indices:
+            try:
+                mensagem = self._filas[indice].get(timeout=max(limite - time.perf_counter(), 0.1))
+            except queue.Empty:
+                mensagem = ("falhou", indice)
+            if mensagem[0] != "pronta":
+                print(f"✗ Câmera no índice {indice} indisponível")
+                self.parar()
+                return None
+            _, _, nome, forma = mensagem
+            self._memorias[indice] = shared_memory.SharedMemory(name=nome)
+            self._buffers[indice] = np.ndarray((2, *forma), dtype=np.uint8, buffer=self._memorias[indice].buf)
+            formas[indice] = forma
+            print(f"✓ Câmera {indice} pronta ({forma[1]}x{forma[0]}) no processo {self._processos[indice].pid}")
+
+        # Sem configuração, as câmeras ficam lado a lado na ordem informada
+        x = 0
+        for indice in self.indices:
+            config = self.transformacoes.get(indice, {'deslocamento': (x, 0)})
+            self._matrizes[indice] = matriz_transformacao(config)
+            x += formas[indice][1]
+
+        # Mosaico do preview: as câmeras lado a lado, na mesma altura, encaixadas no tamanho do
+        # mosaico sem distorcer (o que sobra fica em preto, acima e abaixo ou dos lados)
+        largura_mosaico, altura_mosaico = self.tamanho_mosaico
+        proporcoes = {indice: formas[indice][1] / formas[indice][0] for indice in self.indices}
+        altura = max(min(altura_mosaico, int(largura_mosaico / sum(proporcoes.values()))), 1)
+        larguras = {indice: max(int(proporcoes[indice] * altura), 1) for indice in self.indices}
+        y = (altura_mosaico - altura) // 2
+        x = max(largura_mosaico - sum(larguras.values()), 0) // 2
+        for indice in self.indices:
+            self._regioes[indice] = (slice(y, y + altura), slice(x, x + larguras[indice]))
+            x += larguras[indice]
+        self._mosaico = np.zeros((altura_mosaico, largura_mosaico, 3), dtype=np.uint8)
+        return self
+
+    def definir_ativo(self, ativo):
+        """Liga/desliga a decodificação em todas as câmeras."""
+        self._ativo.value = int(ativo)
+
+    @property
+    def tempo_ultimo_movimento(self):
+        """Último instante (perf_counter) em que alguma câmera viu a imagem mudar."""
+        return max(movimento.value for movimento in self._movimentos.values())
+
+    def definir_backend(self, nome):
+        """Troca o backend de decodificação usado pelos processos."""
+        self._backend.value = nome.encode()
+
+    def frame(self, indice):
+        """Cópia do frame mais recente de uma câmera (usado na calibração)."""
+        with self._travas[indice]:
+            return self._buffers[indice][self._atual(indice)].copy()
+
+    def _atual(self, indice):
+        # O trabalhador alterna entre os buffers 0 e 1 a cada frame, começando pelo 1
+        return self._ids[indice].value % 2
+
+    def _id_total(self):
+        return sum(self._ids[indice].value for indice in self.indices)
+
+    @contextmanager
+    def emprestar_frame(self, ultimo_id, timeout=0.1):
+        """Espera algum frame novo e empresta o mosaico reduzido das câmeras (ou None)."""
+        limite = time.perf_counter() + timeout
+        while self._id_total() <= ultimo_id and time.perf_counter() < limite and not self.falhou:
+            time.sleep(0.002)
+            self._receber()
+        id_total = self._id_total()
+        if id_total <= ultimo_id:
+            yield None
+            return
+
+        for indice in self.indices:
+            with self._travas[indice]:
+                origem = self._buffers[indice][self._atual(indice)]
+                regiao = self._mosaico[self._regioes[indice]]
+                cv2.resize(origem, (regiao.shape[1], regiao.shape[0]), dst=regiao, interpolation=cv2.INTER_AREA)
+        yield self._mosaico, id_total, time.perf_counter()
+
+    def _receber(self):
+        """Consome as mensagens dos processos e publica o resultado mesclado."""
+        novo, tempo_captura, duracao = False, None, 0.0
+        for indice, fila in self._filas.items():
+            while True:
+                try:
+                    mensagem = fila.get_nowait()
+                except queue.Empty:
+                    break
+                if mensagem[0] == "falhou":
+                    self.falhou = True
+                    continue
+                if mensagem[0] == "codigos":
+                    _, _, _, tempo, duracao_camera, leituras = mensagem
+                    self.decodificados += 1
+                    duracao = max(duracao, duracao_camera)
+                else:
+                    _, _, _, tempo, leituras = mensagem  # "pulado": frame parado, leituras confirmadas (ou None)
+                    self.pulados += 1
+                    if leituras is None:
+                        continue
+                self._deteccoes[indice] = [CodigoQR(data, Retangulo(*rect), confianca, id_trilha)
+                                           for data, rect, confianca, id_trilha in leituras]
+                novo = True
+                tempo_captura = tempo if tempo_captura is None else min(tempo_captura, tempo)
+        if novo:
+            self._id_resultado += 1
+            codigos = mesclar_deteccoes(self._deteccoes, self._matrizes)
+            self._resultado = ResultadoDeteccao(codigos, self._id_resultado, tempo_captura, duracao)
+
+    def ultimo_resultado(self):
+        """Retorna o resultado mesclado mais recente (ou None)."""
+        self._receber()
+        return self._resultado
+
+    def parar(self):
+        self._parar.set()
+        for processo in self._processos.values():
+            processo.join(timeout=2.0)
+            if processo.is_alive():
+                processo.terminate()
+        for memoria in self._memorias.values():
+            memoria.close()
@@ -0,0 +1,227 @@
+"""
+Renderização da tela do jogo.
+
+O fundo e o destino não mudam durante a partida, então são compostos uma única
+vez em camadas estáticas (uma sem faixa de mensagem e uma com a faixa
+pré-renderizada de cada jogador, criada na primeira vez em que é usada). A
+cada quadro apenas os retângulos que mudaram são restaurados a partir da
+camada e redesenhados: as células antigas e novas dos personagens, o texto de
+vitória e o preview da câmera.
+
+Os personagens e o destino são `Sprite`s: a cor pré-multiplicada pelo alpha e o
+alpha inverso são calculados uma vez no carregamento, e o blending é feito com
+inteiros em buffers pré-alocados.
+"""
+
+import cv2
+import numpy as np
+
+
+def desenhar_mensagem_executando(tela, largura, altura, usuario, cor):
+    """Desenha mensagem de execução centralizada na tela."""
+    overlay = tela.copy()
+    cv2.rectangle(overlay, (0, altura//2 - 100), (largura, altura//2 + 100), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.7, tela, 0.3, 0, tela)
+    
+    texto1, texto2 = "Analisando caminho", f"Usuario {usuario}"
+    (w1, _), _ = cv2.getTextSize(texto1, cv2.FONT_HERSHEY_SIMPLEX, 2.5, 6)
+    (w2, _), _ = cv2.getTextSize(texto2, cv2.FONT_HERSHEY_SIMPLEX, 2.5, 6)
+    
+    y_centro = altura // 2
+    cv2.putText(tela, texto1, ((largura - w1) // 2, y_centro - 40), 
+               cv2.FONT_HERSHEY_SIMPLEX, 2.5, (255, 255, 255), 6)
+    cv2.putText(tela, texto2, ((largura - w2) // 2, y_centro + 60), 
+               cv2.FONT_HERSHEY_SIMPLEX, 2.5, cor, 6)
+
+
+def desenhar_cenario(tela, destino, destino_img, tamanho_celula):
+    """Desenha destino no cenário."""
+    # Desenha destino (apenas a imagem, sem quadrado amarelo)
+    if destino_img is not None:
+        dx, dy = destino
+        x_destino, y_destino = dx * tamanho_celula, dy * tamanho_celula
+        destino_img.desenhar(tela, x_destino, y_destino)
+
+
+def overlay_image(fundo, imagem, x, y):
+    """Desenha imagem PNG (com transparência) sobre o fundo."""
+    h, w = imagem.shape[:2]
+    if imagem.shape[2] == 4:
+        alpha_s = imagem[:, :, 3] / 255.0
+        alpha_l = 1.0 - alpha_s
+
+        for c in range(3):
+            fundo[y:y+h, x:x+w, c] = (alpha_s * imagem[:, :, c] +
+                                      alpha_l * fundo[y:y+h, x:x+w, c])
+    else:
+        fundo[y:y+h, x:x+w] = imagem
+
+
+def desenhar_marca_jogador(imagem, numero, cor):
+    """Desenha no canto inferior direito do personagem um selo com o número do jogador, na cor dele."""
+    altura, largura = imagem.shape[:2]
+    alpha = (255,) if imagem.shape[2] == 4 else ()
+    raio = max(min(altura, largura) // 6, 8)
+    centro = (largura - raio - 2, altura - raio - 2)
+    cv2.circle(imagem, centro, raio, (*cor, *alpha), -1, cv2.LINE_AA)
+    cv2.circle(imagem, centro, raio, (0, 0, 0, *alpha), max(raio // 8, 1), cv2.LINE_AA)
+
+    # Número branco com contorno preto, legível sobre qualquer cor da paleta
+    texto = str(numero)
+    escala = min(raio / 16, 1.4 * raio / (22 * len(texto)))
+    espessura = max(round(escala * 2), 1)
+    (w, h), _ = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, escala, espessura)
+    origem = (centro[0] - w // 2, centro[1] + h // 2)
+    cv2.putText(imagem, texto, origem, cv2.FONT_HERSHEY_SIMPLEX, escala, (0, 0, 0, *alpha), espessura + 2, cv2.LINE_AA)
+    cv2.putText(imagem, texto, origem, cv2.FONT_HERSHEY_SIMPLEX, escala, (255, 255, 255, *alpha), espessura,
+                cv2.LINE_AA)
+    return imagem
+
+
+class Sprite:
+    """Imagem (com ou sem transparência) pronta para ser desenhada sem alocações por chamada."""
+
+    def __init__(self, imagem):
+        if imagem.shape[2] == 4:
+            # Alpha em 0..256 (exato nos extremos) para dividir por 256 com um shift
+            alpha = imagem[:, :, 3:4].astype(np.uint16)
+            alpha += alpha >> 7
+            cor = imagem[:, :, :3] * alpha
+            self._iniciar(cor, np.ascontiguousarray(np.broadcast_to(256 - alpha, cor.shape)), None)
+        else:
+            self._iniciar(None, None, imagem)
+
+    def _iniciar(self, cor, inverso, imagem):
+        self.cor, self.inverso, self.imagem = cor, inverso, imagem
+        self.altura, self.largura = (imagem if imagem is not None else cor).shape[:2]
+        self._temp = np.empty((self.altura, self.largura, 3), dtype=np.uint16)
+
+    def planos(self):
+        """Arrays que definem o sprite já preparado (para guardar em cache)."""
+        if self.imagem is not None:
+            return {'imagem': self.imagem}
+        return {'cor': self.cor, 'inverso': self.inverso}
+
+    @classmethod
+    def de_planos(cls, planos):
+        """Recria o sprite a partir de `planos()` (podem ser arrays mapeados em memória, só leitura)."""
+        sprite = cls.__new__(cls)
+        sprite._iniciar(planos.get('cor'), planos.get('inverso'), planos.get('imagem'))
+        return sprite
+
+    def desenhar(self, fundo, x, y):
+        """Desenha o sprite em (x, y), recortando a parte que estiver fora do fundo."""
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.largura, fundo.shape[1]), min(y + self.altura, fundo.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        regiao = fundo[y0:y1, x0:x1]
+        recorte = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+        if self.imagem is not None:
+            regiao[...] = self.imagem[recorte]
+            return
+
+        # fundo = (cor * alpha + fundo * (256 - alpha)) >> 8
+        temp = self._temp[recorte]
+        np.multiply(regiao, self.inverso[recorte], out=temp)
+        temp += self.cor[recorte]
+        temp >>= 8
+        np.copyto(regiao, temp, casting='unsafe')
+
+
+def retangulo_texto(texto, origem, escala, espessura):
+    """Retângulo (x, y, w, h) ocupado por um texto desenhado com cv2.putText."""
+    (w, h), base = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, escala, espessura)
+    x, y = origem
+    return x, y - h - espessura, w, h + base + 2 * espessura
+
+
+class PreviewCamera:
+    """Reduz o frame da câmera para o tamanho do preview, sempre no mesmo buffer.
+
+    Só a redução toca o frame em tamanho cheio (INTER_LINEAR por padrão;
+    INTER_NEAREST lê ainda menos pixels, com um preview mais serrilhado). O
+    espelhamento é feito depois, já no tamanho do preview, pelo Renderizador ao
+    copiar para a tela.
+    """
+
+    def __init__(self, largura, altura, interpolacao=cv2.INTER_LINEAR):
+        self.imagem = np.empty((altura, largura, 3), dtype=np.uint8)
+        self.interpolacao = interpolacao
+
+    def atualizar(self, frame):
+        cv2.resize(frame, self.imagem.shape[1::-1], dst=self.imagem, interpolation=self.interpolacao)
+        return self.imagem
+
+
+class Renderizador:
+    """Mantém a tela entre quadros e redesenha só as regiões que mudaram."""
+
+    def __init__(self, recursos, largura, altura, tamanho_celula, destino, preview_config, cores_jogadores):
+        self.preview_config = preview_config
+
+        self.recursos, self.largura, self.altura = recursos, largura, altura
+        self.tamanho_celula, self.destino = tamanho_celula, destino
+        self.cores_jogadores = cores_jogadores
+
+        # Camadas estáticas: fundo + destino, com e sem a faixa de cada jogador
+        self.camadas = {}
+        self.faixa_banner = (0, altura // 2 - 100, largura, 201)  # cv2.rectangle inclui a última linha
+        self.tela = self._camada(None).copy()
+        self._cena = None    # (banner, posições dos personagens, vencedor) do último quadro
+        self._sujos = []     # Retângulos desenhados por cima da camada no último quadro
+        self._forcar = False
+
+    def _camada(self, usuario):
+        """Camada estática com a faixa do jogador (ou sem faixa), composta no primeiro uso."""
+        camada = self.camadas.get(usuario)
+        if camada is None:
+            camada = self.recursos['fundo'].copy()
+            if usuario is not None:
+                desenhar_mensagem_executando(camada, self.largura, self.altura, usuario,
+                                             self.cores_jogadores[usuario])
+            desenhar_cenario(camada, self.destino, self.recursos['destino'], self.tamanho_celula)
+            self.camadas[usuario] = camada
+        return camada
+
+    def _restaurar(self, camada, x, y, w, h):
+        x0, y0 = max(x, 0), max(y, 0)
+        self.tela[y0:y+h, x0:x+w] = camada[y0:y+h, x0:x+w]
+
+    def invalidar(self, rect):
+        """Marca um retângulo desenhado fora do renderizador (ex.: HUD) para ser restaurado."""
+        self._sujos.append(rect)
+        self._forcar = True
+
+    def desenhar(self, banner, personagens, vencedor, preview):
+        """Atualiza a tela. `personagens` é uma lista de (sprite, x, y) em pixels.
+
+        `preview` é o frame já reduzido (PreviewCamera); é espelhado direto na sua região da tela.
+        """
+        cena = (banner, tuple((x, y) for _, x, y in personagens), vencedor)
+        if cena != self._cena or self._forcar:
+            camada = self._camada(banner)
+            if self._cena is None or banner != self._cena[0]:
+                self._restaurar(camada, *self.faixa_banner)
+            for rect in self._sujos:
+                self._restaurar(camada, *rect)
+            self._sujos = []
+
+            # Personagens
+            for sprite, x, y in personagens:
+                sprite.desenhar(self.tela, x, y)
+                self._sujos.append((x, y, sprite.largura, sprite.altura))
+
+            # Vitória
+            if vencedor:
+                texto, origem = f"{vencedor} venceu!", (300, 480)
+                cv2.putText(self.tela, texto, origem, cv2.FONT_HERSHEY_SIMPLEX, 3.0, (0, 150, 0), 6)
+                self._sujos.append(retangulo_texto(texto, origem, 3.0, 6))
+
+            self._cena, self._forcar = cena, False
+
+        # Preview da câmera (sempre por cima de tudo), espelhado como um espelho
+        y, x = self.preview_config['y'], self.preview_config['x']
+        cv2.flip(preview, 1, dst=self.tela[y:y+self.preview_config['altura'], x:x+self.preview_config['largura']])
+        return self.tela
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Replay do jogo sem câmera e sem janela.
+
+Alimenta frames de um vídeo gravado ou de uma pasta de imagens pela mesma
+detecção, estabilização e lógica de movimento do jogo ao vivo, o mais rápido
+possível. O tempo do jogo é simulado a partir do fps da gravação, então o
+intervalo de 0.8 s entre movimentos é reproduzido de forma determinística.
+
+Uso:
+    python replay.py gravacao.mp4                     # Replay de um vídeo
+    python replay.py pasta_frames/ --fps 15           # Replay de uma pasta de imagens
+    python replay.py gravacao.mp4 --trace trace.jsonl # Salva o trace por frame
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+
+import cv2
+
+from deteccao import BACKENDS, DecodificadorQR, calibrar_backend
+from jogo import aguardando_cartas, atualizar_jogo, criar_jogo
+from sessao import GravadorSessao
+
+
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def ler_frames(entrada, fps_padrao):
+    """Retorna (gerador de frames, fps) para um vídeo ou uma pasta de imagens."""
+    if os.path.isdir(entrada):
+        arquivos = sorted(f for f in os.listdir(entrada) if f.lower().endswith(EXTENSOES_IMAGEM))
+        frames = (cv2.imread(os.path.join(entrada, f)) for f in arquivos)
+        return (f for f in frames if f is not None), fps_padrao
+
+    cap = cv2.VideoCapture(entrada)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Erro: não foi possível abrir '{entrada}'")
+    fps = cap.get(cv2.CAP_PROP_FPS) or fps_padrao
+
+    def gerar():
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+        cap.release()
+
+    return gerar(), fps
+
+
+def executar_replay(frames, fps, decodificador, trace=None, largura=1280, altura=960, tamanho_celula=128,
+                    num_jogadores=2, sessao=None):
+    """Roda a partida sobre os frames e retorna um resumo de desempenho.
+
+    Com `sessao` (caminho), grava a partida no mesmo formato binário do jogo ao vivo.
+    """
+    jogo = criar_jogo(largura // tamanho_celula, altura // tamanho_celula, 0.0, mostrar_console=False,
+                      num_jogadores=num_jogadores)
+    gravador = GravadorSessao(sessao, jogo, 0.0) if sessao else None
+    total_frames, decodificados = 0, 0
+    tempo_decodificacao, tempo_logica = 0.0, 0.0
+    inicio = time.perf_counter()
+
+    for indice, frame in enumerate(frames):
+        agora = indice / fps
+        codigos, duracao = [], 0.0
+
+        # Mesma regra do jogo ao vivo: só decodifica enquanto aguarda as cartas
+        decodificou = aguardando_cartas(jogo)
+        if decodificou:
+            t0 = time.perf_counter()
+            codigos = decodificador(frame)
+            duracao = time.perf_counter() - t0
+            tempo_decodificacao += duracao
+            decodificados += 1
+
+        t0 = time.perf_counter()
+        eventos = atualizar_jogo(jogo, codigos, agora)
+        tempo_logica += time.perf_counter() - t0
+        total_frames += 1
+        if gravador is not None:
+            gravador.registrar(agora, indice, codigos if decodificou else None, eventos, jogo['estado'])
+
+        if trace is not None:
+            cartas = [[c.data.decode("utf-8", "replace"), *c.rect]
+                      for c in sorted(codigos, key=lambda c: c.rect.left)]
+            trace.write(json.dumps({
+                'frame': indice, 't': round(agora, 4), 'decodificacao_ms': round(duracao * 1000, 3),
+                'cartas': cartas, 'eventos': eventos,
+                'posicoes': jogo['posicoes'].tolist(),
+            }, ensure_ascii=False) + "\n")
+
+    decorrido = time.perf_counter() - inicio
+    if gravador is not None:
+        gravador.fechar()
+    return {
+        'frames': total_frames,
+        'segundos': decorrido,
+        'fps': total_frames / decorrido if decorrido else 0.0,
+        'decodificacoes': decodificados,
+        'decodificacao_ms_media': 1000 * tempo_decodificacao / decodificados if decodificados else 0.0,
+        'logica_us_media': 1e6 * tempo_logica / total_frames if total_frames else 0.0,
+        'vencedor': jogo['estado']['vencedor'],
+        'posicoes': dict(zip(jogo['jogadores'], jogo['posicoes'].tolist())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Executa o jogo QR Code sobre um vídeo gravado ou uma pasta de frames, sem câmera nem janela.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python replay.py gravacao.mp4
+  python replay.py pasta_frames/ --fps 15 --trace trace.jsonl
+  python replay.py gravacao.mp4 --backend opencv
+        """
+    )
+    parser.add_argument('entrada', help='Arquivo de vídeo ou pasta com imagens (ordem alfabética)')
+    parser.add_argument('--fps', type=float, default=30.0,
+                        help='Fps usado para simular o tempo quando a entrada não informa (padrão: 30)')
+    parser.add_argument('--trace', help='Arquivo JSON Lines com detecções e eventos de cada frame')
+    parser.add_argument('--jogadores', type=int, default=2,
+                        help='Número de jogadores da partida (padrão: 2)')
+    parser.add_argument('--sessao', help='Grava a partida no formato binário de sessões (ver sessao.py)')
+    parser.add_argument('--backend', choices=['auto', *BACKENDS], default='auto',
+                        help='Decodificador de QR code (padrão: calibração automática)')
+    args = parser.parse_args()
+
+    frames, fps = ler_frames(args.entrada, args.fps)
+
+    if args.backend == 'auto':
+        # Calibra com os primeiros frames e os devolve ao início da sequência
+        primeiros = list(itertools.islice(frames, 5))
+        backend = calibrar_backend(primeiros)
+        frames = itertools.chain(primeiros, frames)
+    else:
+        backend = BACKENDS[args.backend]()
+
+    print(f"\n▶️  Replay de '{args.entrada}' ({fps:.1f} fps simulados)...")
+    trace = open(args.trace, "w", encoding="utf-8") if args.trace else None
+    try:
+        resumo = executar_replay(frames, fps, DecodificadorQR(backend), trace, num_jogadores=args.jogadores,
+                                 sessao=args.sessao)
+    finally:
+        if trace is not None:
+            trace.close()
+
+    print(f"✓ {resumo['frames']} frames em {resumo['segundos']:.2f} s ({resumo['fps']:.1f} fps)")
+    print(f"✓ Decodificação: {resumo['decodificacoes']} frames, média {resumo['decodificacao_ms_media']:.1f} ms")
+    print(f"✓ Lógica do jogo: média {resumo['logica_us_media']:.1f} µs/frame")
+    posicoes = " | ".join(f"Jogador {jogador} em {pos}" for jogador, pos in resumo['posicoes'].items())
+    print(f"✓ Vencedor: {resumo['vencedor'] or 'nenhum'} | {posicoes}")
+    if trace is not None:
+        print(f"✓ Trace salvo em '{args.trace}'")
+    if args.sessao:
+        print(f"✓ Sessão gravada em '{args.sessao}'")
+
+
+if __name__ == "__main__":
+    main()
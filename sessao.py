@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Gravação binária das partidas e análise das gravações.
+
+O gravador acrescenta registros binários (struct) ao fim do arquivo:
+início de sessão, leituras de cada frame decodificado (carta + retângulo +
+confiança), transições de estado, sequências capturadas, movimentos e,
+opcionalmente, miniaturas JPEG dos frames. O conteúdo de cada QR code é gravado
+uma única vez como token; os frames guardam só o número do token. Um arquivo
+pode acumular várias sessões, e um registro cortado no fim (jogo fechado à
+força) é ignorado na leitura.
+
+O leitor mapeia o arquivo em memória (mmap) e percorre os cabeçalhos dos
+registros pulando o que não interessa, então horas de gravação são analisadas
+em segundos: tempo até cada jogador ter a sequência capturada, taxa de leituras
+erradas, tempo em cada estado da partida.
+
+Uso:
+    python main.py --sessao partidas.sessao                  # Grava as partidas
+    python sessao.py partidas.sessao                         # Estatísticas
+    python sessao.py a.sessao b.sessao --json resumo.json
+    python sessao.py partidas.sessao --imagens frames/       # Extrai as miniaturas gravadas
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+
+import cv2
+import numpy as np
+
+from cartas import interpretar_carta
+from jogo import CONFIANCA_MINIMA
+from simulacao import INDICES_DIRECAO
+
+
+MAGICO = b"QRSESS01"
+
+# Tipos de registro
+SESSAO, TOKEN, QUADRO, ESTADO, SEQUENCIA, MOVIMENTO, IMAGEM = range(7)
+
+CABECALHO = struct.Struct("<BdI")        # tipo, instante (s), tamanho do conteúdo
+INICIO = struct.Struct("<BHH")           # jogadores, colunas, linhas
+NUMERO_TOKEN = struct.Struct("<I")       # seguido do conteúdo do QR code
+LEITURAS = struct.Struct("<IH")          # id do frame, quantidade de cartas
+CARTA = struct.Struct("<If4i")           # token, confiança, x, y, largura, altura
+SNAPSHOT_ESTADO = struct.Struct("<??bb")  # aguardando_todos, jogo_ativo, executando, vencedor (-1 = nenhum)
+CAPTURA = struct.Struct("<BH")           # jogador, quantidade de comandos (seguido dos índices, int8)
+PASSO = struct.Struct("<BBHH")           # jogador, direção, x, y
+MINIATURA = struct.Struct("<I")          # id do frame (seguido do JPEG)
+
+
+def descrever_estado(aguardando_todos, jogo_ativo, executando, vencedor, jogadores):
+    """Nome curto do estado: aguardando_todos, executando_j<N>, vencedor_j<N> ou encerrado."""
+    if vencedor >= 0:
+        return f"vencedor_j{jogadores[vencedor]}"
+    if not jogo_ativo:
+        return "encerrado"
+    if aguardando_todos or executando < 0:
+        return "aguardando_todos"
+    return f"executando_j{jogadores[executando]}"
+
+
+class GravadorSessao:
+    """Acrescenta uma sessão ao arquivo; `registrar` recebe as leituras e os eventos de cada frame."""
+
+    def __init__(self, caminho, jogo, agora, intervalo_imagens=0, largura_imagem=320, qualidade_jpeg=70):
+        self.jogadores = list(jogo['jogadores'])
+        self.intervalo_imagens = intervalo_imagens
+        self.largura_imagem = largura_imagem
+        self.qualidade_jpeg = qualidade_jpeg
+        self._tokens = {}
+        self._imagens = 0
+        self._miniatura = None
+
+        novo = not os.path.exists(caminho) or os.path.getsize(caminho) == 0
+        if not novo:
+            # Descarta um registro cortado no fim (jogo fechado à força) antes de acrescentar
+            with LeitorSessao(caminho) as leitor:
+                fim = leitor.fim_valido()
+            if fim < os.path.getsize(caminho):
+                os.truncate(caminho, fim)
+        self._arquivo = open(caminho, "ab", buffering=1 << 16)
+        if novo:
+            self._arquivo.write(MAGICO)
+        self._escrever(SESSAO, agora, INICIO.pack(len(self.jogadores), jogo['grid_cols'], jogo['grid_rows']))
+        self._escrever(ESTADO, agora, self._snapshot(jogo['estado']))
+
+    def _escrever(self, tipo, agora, conteudo):
+        self._arquivo.write(CABECALHO.pack(tipo, agora, len(conteudo)))
+        self._arquivo.write(conteudo)
+
+    def _token(self, dados, agora):
+        numero = self._tokens.get(dados)
+        if numero is None:
+            numero = self._tokens[dados] = len(self._tokens)
+            self._escrever(TOKEN, agora, NUMERO_TOKEN.pack(numero) + dados)
+        return numero
+
+    def _indice(self, jogador):
+        return self.jogadores.index(jogador)
+
+    def _snapshot(self, estado):
+        executando = -1 if estado['executando'] is None else estado['executando']
+        vencedor = -1 if estado['vencedor'] is None else self._indice(estado['vencedor'].split()[-1])
+        return SNAPSHOT_ESTADO.pack(estado['aguardando_todos'], estado['jogo_ativo'], executando, vencedor)
+
+    def registrar(self, agora, id_frame, codigos, eventos, estado):
+        """Grava as leituras de um resultado novo (`codigos`, mesmo vazio) e os eventos do frame.
+
+        Com `codigos=None` (nenhum resultado novo neste frame) grava só os eventos.
+        """
+        if codigos is not None:
+            cartas = b"".join(CARTA.pack(self._token(c.data, agora), c.confianca, *c.rect) for c in codigos)
+            self._escrever(QUADRO, agora, LEITURAS.pack(id_frame, len(codigos)) + cartas)
+
+        for evento in eventos:
+            tipo = evento['tipo']
+            if tipo == 'estado':
+                self._escrever(ESTADO, agora, self._snapshot(estado))
+            elif tipo == 'sequencia_capturada':
+                comandos = bytes(INDICES_DIRECAO[c] for c in evento['comandos'])
+                self._escrever(SEQUENCIA, agora,
+                               CAPTURA.pack(self._indice(evento['jogador']), len(comandos)) + comandos)
+            elif tipo == 'movimento':
+                x, y = evento['posicao']
+                self._escrever(MOVIMENTO, agora, PASSO.pack(self._indice(evento['jogador']),
+                                                            INDICES_DIRECAO[evento['direcao']], x, y))
+
+    def registrar_imagem(self, agora, id_frame, frame):
+        """Grava uma miniatura JPEG a cada `intervalo_imagens` chamadas (0 desliga)."""
+        if not self.intervalo_imagens:
+            return
+        self._imagens += 1
+        if self._imagens % self.intervalo_imagens:
+            return
+        altura = round(frame.shape[0] * self.largura_imagem / frame.shape[1])
+        if self._miniatura is None or self._miniatura.shape[:2] != (altura, self.largura_imagem):
+            self._miniatura = np.empty((altura, self.largura_imagem, 3), dtype=np.uint8)
+        cv2.resize(frame, (self.largura_imagem, altura), dst=self._miniatura, interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", self._miniatura, [cv2.IMWRITE_JPEG_QUALITY, self.qualidade_jpeg])
+        if ok:
+            self._escrever(IMAGEM, agora, MINIATURA.pack(id_frame) + jpeg.tobytes())
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class LeitorSessao:
+    """Lê um arquivo de sessões mapeado em memória."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, "rb") as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapa[:len(MAGICO)] != MAGICO:
+            self._mapa.close()
+            raise ValueError(f"'{caminho}' não é um arquivo de sessão")
+
+    def registros(self, tipos=None):
+        """Gera (tipo, instante, posição, tamanho) de cada registro, sem copiar o conteúdo."""
+        mapa = self._mapa
+        posicao, fim = len(MAGICO), len(mapa)
+        while posicao + CABECALHO.size <= fim:
+            tipo, agora, tamanho = CABECALHO.unpack_from(mapa, posicao)
+            posicao += CABECALHO.size
+            if posicao + tamanho > fim:
+                break  # Registro incompleto no fim do arquivo
+            if tipos is None or tipo in tipos:
+                yield tipo, agora, posicao, tamanho
+            posicao += tamanho
+
+    def fim_valido(self):
+        """Posição logo após o último registro completo."""
+        fim = len(MAGICO)
+        for _, _, posicao, tamanho in self.registros():
+            fim = posicao + tamanho
+        return fim
+
+    def ler(self, formato, posicao):
+        """Campos de `formato` (struct) a partir de `posicao`."""
+        return formato.unpack_from(self._mapa, posicao)
+
+    def trecho(self, inicio, fim):
+        """Cópia dos bytes entre `inicio` e `fim`."""
+        return self._mapa[inicio:fim]
+
+    def cartas(self, posicao):
+        """(id do frame, [(token, confiança, (x, y, largura, altura)), ...]) de um registro QUADRO."""
+        id_frame, quantidade = LEITURAS.unpack_from(self._mapa, posicao)
+        posicao += LEITURAS.size
+        cartas = []
+        for i in range(quantidade):
+            token, confianca, *rect = CARTA.unpack_from(self._mapa, posicao + i * CARTA.size)
+            cartas.append((token, confianca, rect))
+        return id_frame, cartas
+
+    def fechar(self):
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+def _nova_sessao(inicio, jogadores):
+    return {'inicio': inicio, 'fim': inicio, 'jogadores': jogadores, 'tokens': {},
+            'estado': "aguardando_todos", 'desde': inicio, 'inicio_espera': inicio}
+
+
+def estatisticas(caminhos):
+    """Resumo de todas as sessões dos arquivos."""
+    resumo = {
+        'sessoes': 0, 'duracao_s': 0.0, 'frames_decodificados': 0, 'leituras': 0,
+        'leituras_erradas': 0, 'leituras_incertas': 0, 'frames_sem_cartas': 0,
+        'capturas': 0, 'movimentos': 0, 'imagens': 0, 'vitorias': {},
+        'tempo_ate_captura_s': [], 'tempo_por_estado_s': {},
+    }
+    tempo_por_estado = resumo['tempo_por_estado_s']
+
+    def fechar_estado(sessao, agora):
+        tempo_por_estado[sessao['estado']] = tempo_por_estado.get(sessao['estado'], 0.0) + agora - sessao['desde']
+        sessao['desde'] = agora
+
+    def encerrar(sessao):
+        if sessao is not None:
+            fechar_estado(sessao, sessao['fim'])
+            resumo['duracao_s'] += sessao['fim'] - sessao['inicio']
+
+    for caminho in caminhos:
+        sessao = None
+        with LeitorSessao(caminho) as leitor:
+            for tipo, agora, posicao, tamanho in leitor.registros():
+                if tipo == SESSAO:
+                    encerrar(sessao)
+                    quantidade, _, _ = leitor.ler(INICIO, posicao)
+                    sessao = _nova_sessao(agora, [str(i) for i in range(1, quantidade + 1)])
+                    resumo['sessoes'] += 1
+                    continue
+                if sessao is None:
+                    continue
+                sessao['fim'] = agora
+
+                if tipo == TOKEN:
+                    (numero,) = leitor.ler(NUMERO_TOKEN, posicao)
+                    carta = interpretar_carta(leitor.trecho(posicao + NUMERO_TOKEN.size, posicao + tamanho))
+                    # Leitura errada: não é carta de jogador da sessão ou não tem comando válido
+                    sessao['tokens'][numero] = (carta is not None and carta.comando is not None
+                                                and carta.jogador in sessao['jogadores'])
+                elif tipo == QUADRO:
+                    _, cartas = leitor.cartas(posicao)
+                    resumo['frames_decodificados'] += 1
+                    resumo['leituras'] += len(cartas)
+                    resumo['frames_sem_cartas'] += not cartas
+                    for token, confianca, _ in cartas:
+                        resumo['leituras_erradas'] += not sessao['tokens'][token]
+                        resumo['leituras_incertas'] += confianca < CONFIANCA_MINIMA
+                elif tipo == ESTADO:
+                    nome = descrever_estado(*leitor.ler(SNAPSHOT_ESTADO, posicao), sessao['jogadores'])
+                    if nome != sessao['estado']:
+                        fechar_estado(sessao, agora)
+                        if nome == "aguardando_todos":
+                            sessao['inicio_espera'] = agora
+                        elif nome.startswith("vencedor_j"):
+                            jogador = nome[len("vencedor_j"):]
+                            resumo['vitorias'][jogador] = resumo['vitorias'].get(jogador, 0) + 1
+                        sessao['estado'] = nome
+                elif tipo == SEQUENCIA:
+                    resumo['capturas'] += 1
+                    resumo['tempo_ate_captura_s'].append(agora - sessao['inicio_espera'])
+                elif tipo == MOVIMENTO:
+                    resumo['movimentos'] += 1
+                elif tipo == IMAGEM:
+                    resumo['imagens'] += 1
+        encerrar(sessao)
+
+    tempos = np.array(resumo.pop('tempo_ate_captura_s'))
+    resumo['tempo_ate_captura_s'] = {
+        'media': float(tempos.mean()) if len(tempos) else None,
+        'p50': float(np.percentile(tempos, 50)) if len(tempos) else None,
+        'p95': float(np.percentile(tempos, 95)) if len(tempos) else None,
+    }
+    resumo['taxa_leituras_erradas'] = resumo['leituras_erradas'] / resumo['leituras'] if resumo['leituras'] else 0.0
+    resumo['taxa_leituras_incertas'] = (resumo['leituras_incertas'] / resumo['leituras']
+                                        if resumo['leituras'] else 0.0)
+    return resumo
+
+
+def extrair_imagens(caminho, pasta):
+    """Salva as miniaturas JPEG gravadas em `pasta`. Retorna quantas foram salvas."""
+    os.makedirs(pasta, exist_ok=True)
+    prefixo = os.path.splitext(os.path.basename(caminho))[0]
+    salvas = 0
+    with LeitorSessao(caminho) as leitor:
+        for _, _, posicao, tamanho in leitor.registros({IMAGEM}):
+            (id_frame,) = leitor.ler(MINIATURA, posicao)
+            with open(os.path.join(pasta, f"{prefixo}_{salvas:06d}_frame{id_frame}.jpg"), "wb") as arquivo:
+                arquivo.write(leitor.trecho(posicao + MINIATURA.size, posicao + tamanho))
+            salvas += 1
+    return salvas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estatísticas das partidas gravadas com 'python main.py --sessao ARQUIVO'.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python sessao.py partidas.sessao
+  python sessao.py a.sessao b.sessao --json resumo.json
+  python sessao.py partidas.sessao --imagens frames/
+        """
+    )
+    parser.add_argument('arquivos', nargs='+', help='Arquivos de sessão')
+    parser.add_argument('--json', help='Salva o resumo em JSON')
+    parser.add_argument('--imagens', metavar='PASTA', help='Extrai as miniaturas JPEG gravadas para a pasta')
+    args = parser.parse_args()
+
+    resumo = estatisticas(args.arquivos)
+    tempos = resumo['tempo_ate_captura_s']
+    print(f"\n📼 {resumo['sessoes']} sessões, {resumo['duracao_s'] / 60:.1f} min gravados")
+    print(f"✓ {resumo['frames_decodificados']} frames decodificados, {resumo['leituras']} leituras "
+          f"({resumo['frames_sem_cartas']} frames sem cartas)")
+    print(f"✓ Leituras erradas: {100 * resumo['taxa_leituras_erradas']:.2f}% | "
+          f"incertas: {100 * resumo['taxa_leituras_incertas']:.2f}%")
+    if tempos['media'] is not None:
+        print(f"✓ Tempo até a captura: média {tempos['media']:.1f} s, p50 {tempos['p50']:.1f} s, "
+              f"p95 {tempos['p95']:.1f} s ({resumo['capturas']} sequências)")
+    print(f"✓ Movimentos: {resumo['movimentos']} | Vitórias: "
+          f"{', '.join(f'Jogador {j}: {n}' for j, n in sorted(resumo['vitorias'].items())) or 'nenhuma'}")
+    for nome, segundos in sorted(resumo['tempo_por_estado_s'].items()):
+        print(f"   {nome}: {segundos:.1f} s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resumo, arquivo, indent=2, ensure_ascii=False)
+        print(f"✓ Resumo salvo em '{args.json}'")
+    if args.imagens:
+        salvas = sum(extrair_imagens(caminho, args.imagens) for caminho in args.arquivos)
+        print(f"✓ {salvas} imagens salvas em '{args.imagens}'")
+
+
+if __name__ == "__main__":
+    main()
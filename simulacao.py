@@ -0,0 +1,96 @@
+"""
+Simulação em lote de sequências de comandos, sem câmera e sem tempo real.
+
+As sequências são matrizes NumPy int8 (uma linha por sequência, uma coluna por
+passo) com os índices de DIRECOES e -1 como preenchimento. Todas as sequências
+avançam juntas um passo por vez, com as mesmas regras de
+`jogo.executar_movimento` (movimentos contra a borda do tabuleiro não saem do
+lugar), então milhares de sequências custam algumas operações vetoriais por
+passo em vez de uma chamada Python por movimento.
+
+Serve para gerar e conferir desafios (posição final, passos, batidas na borda e
+se o destino é alcançado) e para pontuar partidas gravadas.
+"""
+
+import numpy as np
+
+from cartas import DIRECOES
+
+
+SEM_COMANDO = -1
+
+# Deslocamentos em x e y de cada direção, na mesma ordem de DIRECOES; o último
+# elemento (zero) é o que SEM_COMANDO (-1) indexa, então o preenchimento não anda
+DESLOCAMENTO_X = np.array([0, 0, -1, 1, 0], dtype=np.int32)
+DESLOCAMENTO_Y = np.array([-1, 1, 0, 0, 0], dtype=np.int32)
+INDICES_DIRECAO = {direcao: i for i, direcao in enumerate(DIRECOES)}
+
+
+def codificar_sequencias(sequencias, comprimento=None):
+    """Converte listas de direções em uma matriz int8 preenchida com SEM_COMANDO."""
+    comprimento = max(map(len, sequencias), default=0) if comprimento is None else comprimento
+    comandos = np.full((len(sequencias), comprimento), SEM_COMANDO, dtype=np.int8)
+    for i, sequencia in enumerate(sequencias):
+        if len(sequencia) > comprimento:
+            raise ValueError(f"Sequência {i} tem {len(sequencia)} comandos (máximo {comprimento})")
+        try:
+            comandos[i, :len(sequencia)] = [INDICES_DIRECAO[direcao] for direcao in sequencia]
+        except KeyError as erro:
+            raise ValueError(f"Comando desconhecido na sequência {i}: {erro.args[0]!r}") from None
+    return comandos
+
+
+def simular(comandos, grid_cols, grid_rows, inicio=None, destino=None, parar_no_destino=True):
+    """Executa todas as sequências de uma vez.
+
+    `inicio` e `destino` seguem o padrão de `jogo.criar_jogo`; `inicio` também
+    aceita uma posição por sequência (matriz N x 2). Com `parar_no_destino`,
+    como na partida, a sequência para de andar ao chegar ao destino.
+
+    Retorna um dicionário de arrays com uma entrada por sequência:
+    'posicoes' (N x 2), 'passos' (comandos executados), 'batidas' (movimentos
+    bloqueados pela borda), 'chegou' (passou pelo destino), 'passo_chegada'
+    (passos até chegar, ou -1) e 'terminou_no_destino'.
+    """
+    comandos = np.asarray(comandos, dtype=np.int8)
+    if comandos.ndim == 1:
+        comandos = comandos[np.newaxis]
+    quantidade = len(comandos)
+    inicio = np.broadcast_to(np.asarray((0, grid_rows - 1) if inicio is None else inicio, dtype=np.int32),
+                             (quantidade, 2))
+    destino_x, destino_y = (grid_cols - 1, 0) if destino is None else destino
+
+    x, y = inicio[:, 0].copy(), inicio[:, 1].copy()
+    passos = np.zeros(quantidade, dtype=np.int32)
+    batidas = np.zeros(quantidade, dtype=np.int32)
+    passo_chegada = np.where((x == destino_x) & (y == destino_y), 0, -1).astype(np.int32)
+    ativos = passo_chegada < 0 if parar_no_destino else np.ones(quantidade, dtype=bool)
+
+    for coluna in comandos.T:
+        validos = (coluna != SEM_COMANDO) & ativos
+        if not validos.any():
+            continue
+        dx, dy = DESLOCAMENTO_X[coluna], DESLOCAMENTO_Y[coluna]
+        if parar_no_destino:
+            dx *= validos
+            dy *= validos
+        novo_x = np.clip(x + dx, 0, grid_cols - 1)
+        novo_y = np.clip(y + dy, 0, grid_rows - 1)
+        # Todo comando válido desloca em x ou y; se nada mudou, a borda bloqueou
+        batidas += validos & (novo_x == x) & (novo_y == y)
+        passos += validos
+        x, y = novo_x, novo_y
+
+        chegaram = validos & (passo_chegada < 0) & (x == destino_x) & (y == destino_y)
+        passo_chegada[chegaram] = passos[chegaram]
+        if parar_no_destino:
+            ativos &= ~chegaram
+
+    return {
+        'posicoes': np.stack([x, y], axis=1),
+        'passos': passos,
+        'batidas': batidas,
+        'chegou': passo_chegada >= 0,
+        'passo_chegada': passo_chegada,
+        'terminou_no_destino': (x == destino_x) & (y == destino_y),
+    }
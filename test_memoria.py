@@ -0,0 +1,20 @@
+"""
+Alocações por quadro do loop principal depois do aquecimento (tracemalloc).
+
+Usa as cartas de recursos/ e as imagens de imagens/, como o benchmark.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from benchmark import LIMITE_PICO_QUADRO, LIMITE_RETIDO_QUADRO, carregar_cartas, medir_memoria
+
+
+def test_loop_principal_nao_aloca_por_quadro():
+    if not os.path.exists(os.path.join("recursos", "Jogador1_Inicio.png")):
+        pytest.skip("cartas não encontradas (rode python gerar_recursos.py --qrcodes)")
+    atual = medir_memoria(carregar_cartas(), np.random.default_rng(0), quadros=60, aquecimento=20)['atual']
+    assert atual['pico_max_bytes'] <= LIMITE_PICO_QUADRO
+    assert atual['retido_por_quadro_bytes'] <= LIMITE_RETIDO_QUADRO
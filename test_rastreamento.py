@@ -0,0 +1,104 @@
+"""
+Rastreamento de cartas: uma carta movida não pode deixar uma leitura fantasma,
+e a mesa parada é capturada logo mesmo com o agendador reaproveitando frames.
+
+Usa as cartas de recursos/ (python gerar_recursos.py --qrcodes) e o backend
+OpenCV em frames sintéticos.
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmark import CameraSintetica
+from captura import CapturaAssincrona, DecodificadorAssincrono
+from deteccao import AgendadorDecodificacao, BackendOpenCV, DecodificadorQR
+from jogo import avancar_jogo, criar_jogo
+
+
+TAMANHO_CARTA = 160
+
+
+def carregar_carta(nome):
+    caminho = os.path.join("recursos", f"{nome}.png")
+    carta = cv2.imread(caminho, cv2.IMREAD_GRAYSCALE)
+    if carta is None:
+        pytest.skip(f"{caminho} não encontrado (rode python gerar_recursos.py --qrcodes)")
+    return cv2.resize(carta, (TAMANHO_CARTA, TAMANHO_CARTA), interpolation=cv2.INTER_AREA)
+
+
+def montar_frame(cartas):
+    """Frame 1280x720 com as cartas [(imagem, x)] em uma linha."""
+    frame = np.full((720, 1280), 110, dtype=np.uint8)
+    for carta, x in cartas:
+        frame[200:200 + TAMANHO_CARTA, x:x + TAMANHO_CARTA] = carta
+    return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+
+def test_carta_movida_nao_duplica_a_sequencia():
+    inicio, cima, fim = (carregar_carta(f"Jogador1_{nome}") for nome in ("Inicio", "Cima", "Fim"))
+    decodificador = DecodificadorQR(BackendOpenCV())
+    jogo = criar_jogo(6, 6, 0.0, mostrar_console=False, num_jogadores=1)
+
+    # Sequência ainda sem FIM: as cartas ficam na mesa até a confiança chegar a 1
+    antes = montar_frame([(inicio, 40), (cima, 300)])
+    for _ in range(8):
+        codigos = decodificador(antes)
+        avancar_jogo(jogo, codigos, 1)
+    assert sorted(c.data for c in codigos) == [b"1-cima", b"1-inicio"]
+
+    # A carta CIMA é movida para a direita e a carta FIM é colocada
+    depois = montar_frame([(inicio, 40), (cima, 520), (fim, 800)])
+    capturas = []
+    for _ in range(12):
+        codigos = decodificador(depois)
+        assert [c.data for c in sorted(codigos, key=lambda c: c.rect.left)] == [b"1-inicio", b"1-cima", b"1-fim"]
+        eventos = avancar_jogo(jogo, codigos, 1)
+        capturas += [e['comandos'] for e in eventos if e['tipo'] == 'sequencia_capturada']
+    assert capturas == [["cima"]]
+
+
+def test_sequencia_so_e_capturada_com_confianca():
+    inicio, cima, fim = (carregar_carta(f"Jogador1_{nome}") for nome in ("Inicio", "Cima", "Fim"))
+    decodificador = DecodificadorQR(BackendOpenCV(), frames_confianca=5)
+    jogo = criar_jogo(6, 6, 0.0, mostrar_console=False, num_jogadores=1)
+    frame = montar_frame([(inicio, 40), (cima, 300), (fim, 560)])
+
+    capturado_em = None
+    for chamada in range(1, 9):
+        eventos = avancar_jogo(jogo, decodificador(frame), 1)
+        if capturado_em is None and any(e['tipo'] == 'sequencia_capturada' for e in eventos):
+            capturado_em = chamada
+    assert capturado_em == 5
+
+
+def test_mesa_parada_e_capturada_com_o_agendador_ligado():
+    inicio, cima, fim = (carregar_carta(f"Jogador1_{nome}") for nome in ("Inicio", "Cima", "Fim"))
+    frame = montar_frame([(inicio, 40), (cima, 300), (fim, 560)])
+    jogo = criar_jogo(6, 6, 0.0, mostrar_console=False, num_jogadores=1)
+
+    # Câmera parada a 30 fps: depois da primeira decodificação o agendador só reaproveita frames
+    captura = CapturaAssincrona(CameraSintetica([frame], fps=30)).iniciar()
+    decodificador = DecodificadorAssincrono(captura, DecodificadorQR(BackendOpenCV()),
+                                            agendador=AgendadorDecodificacao()).iniciar()
+    capturado_no_frame, id_resultado = None, 0
+    limite = time.perf_counter() + 5.0
+    try:
+        while capturado_no_frame is None and time.perf_counter() < limite:
+            resultado = decodificador.ultimo_resultado()
+            if resultado is None or resultado.id_frame == id_resultado:
+                time.sleep(0.005)
+                continue
+            id_resultado = resultado.id_frame
+            eventos = avancar_jogo(jogo, resultado.codigos, 0)
+            if any(e['tipo'] == 'sequencia_capturada' for e in eventos):
+                capturado_no_frame = resultado.id_frame
+    finally:
+        decodificador.parar()
+        captura.parar()
+
+    # frames_confianca=5 confirmações; sem contar os frames reaproveitados seriam ~60 (2 s)
+    assert capturado_no_frame is not None and capturado_no_frame <= 10